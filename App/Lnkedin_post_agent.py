@@ -1,12 +1,18 @@
 import os
+import csv
+import json
 import asyncio
-from typing import List
+import argparse
+from typing import Dict, Iterator, List
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI  # ✅ Correct import
 from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
 from langchain.schema.output_parser import StrOutputParser
+from post_parser import StreamingPostParser
+from circuit_breaker import CircuitBreaker
+from batch_journal import BatchJournal
+from cache import make_cache_key
 
 
 # Load environment variables
@@ -15,6 +21,12 @@ load_dotenv()
 BASE_URL = os.getenv("BASE_URL") 
 API_KEY = os.getenv("API_KEY") 
 MODEL_NAME = os.getenv("MODEL_NAME") 
+# Seconds before a model call is abandoned (counts as a failure for the circuit breaker)
+LLM_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "120"))
+# Consecutive failures after which the model is skipped (fallback posts are returned)
+# until a probe after CIRCUIT_RESET_TIMEOUT seconds succeeds
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
 
 if not BASE_URL or not MODEL_NAME:
     raise ValueError("Please set BASE_URL and MODEL_NAME in your .env file")
@@ -49,6 +61,7 @@ llm = ChatOpenAI(
     api_key=API_KEY,
     model=MODEL_NAME,
     temperature=0.7,
+    timeout=LLM_TIMEOUT,
 )
 
 
@@ -86,90 +99,74 @@ Remember to:
 """
 )
 
-# Create the LLM chain
-linkedin_chain = LLMChain(
-    llm=llm,
-    prompt=linkedin_post_prompt,
-    output_parser=StrOutputParser()
-)
+# Create the LLM chain (LCEL returns the generated text directly; the deprecated
+# LLMChain returned a dict, which made every post fall back to the default one)
+linkedin_chain = linkedin_post_prompt | llm | StrOutputParser()
 
 # --- LinkedIn Post Generator Agent ---
 
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the model while its circuit is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Model circuit is open")
+        # Seconds until a probe call is let through (0 while another caller's probe runs)
+        self.retry_after = retry_after
+
 class LinkedInPostAgent:
     """AI Agent for generating LinkedIn posts using LangChain"""
     
     def __init__(self):
         self.chain = linkedin_chain
+        # Skips the model entirely during an outage instead of waiting out every timeout
+        self.breaker = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
         
-    async def generate_post(self, topic: str, language: str = "English") -> LinkedInPost:
+    async def generate_post(self, topic: str, language: str = "English", fallback: bool = True) -> LinkedInPost:
         """
         Generate a LinkedIn post for the given topic and language
         
         Args:
             topic (str): The topic of the post (e.g., "AI in Healthcare", "Remote Work Productivity")
             language (str): The language of the post (e.g., "English", "Bengali", "Spanish")
+            fallback (bool): Return a generic fallback post when generation fails; if False the error is raised
             
         Returns:
             LinkedInPost: Structured LinkedIn post object
         """
+        if not self.breaker.allow_request():
+            if not fallback:
+                raise CircuitOpenError(self.breaker.retry_after())
+            print("Model circuit is open, using fallback post")
+            return self._create_fallback_post(topic, language)
+        
         try:
             # Generate the post using the LangChain
             result = await self.chain.ainvoke({
                 "topic": topic,
                 "language": language
             })
+            self.breaker.record_success()
             
             # Parse the generated content
             return self._parse_generated_content(result, topic, language)
             
         except Exception as e:
+            self.breaker.record_failure()
+            if not fallback:
+                raise
             print(f"Error generating post: {str(e)}")
             return self._create_fallback_post(topic, language)
     
     def _parse_generated_content(self, content: str, topic: str, language: str) -> LinkedInPost:
         """Parse the generated content into structured format"""
         try:
-            lines = content.strip().split('\n')
-            title = ""
-            post_content = ""
-            hashtags = []
-            call_to_action = ""
-            
-            current_section = None
-            content_lines = []
-            
-            for line in lines:
-                line = line.strip()
-                if line.startswith("TITLE:"):
-                    title = line.replace("TITLE:", "").strip()
-                    current_section = "title"
-                elif line.startswith("CONTENT:"):
-                    current_section = "content"
-                    content_text = line.replace("CONTENT:", "").strip()
-                    if content_text:
-                        content_lines.append(content_text)
-                elif line.startswith("HASHTAGS:"):
-                    hashtags_text = line.replace("HASHTAGS:", "").strip()
-                    hashtags = [tag.strip() for tag in hashtags_text.split(",") if tag.strip()]
-                    current_section = "hashtags"
-                elif line.startswith("CALL_TO_ACTION:"):
-                    call_to_action = line.replace("CALL_TO_ACTION:", "").strip()
-                    current_section = "cta"
-                elif current_section == "content" and line:
-                    content_lines.append(line)
-            
-            # Join content lines
-            if not post_content:
-                post_content = "\n\n".join(content_lines) if content_lines else ""
-            
-            # Clean up hashtags (remove # if present)
-            hashtags = [tag.replace("#", "") for tag in hashtags]
+            parser = StreamingPostParser.parse(content)
             
             return LinkedInPost(
-                title=title or f"Professional Insights on {topic}",
-                content=post_content or f"Here's what I think about {topic} and its impact on our industry...",
-                hashtags=hashtags or ["professional", "insights", "networking"],
-                call_to_action=call_to_action or "What are your thoughts on this topic? Share your experience in the comments!"
+                title=parser.title or f"Professional Insights on {topic}",
+                content=parser.content or f"Here's what I think about {topic} and its impact on our industry...",
+                hashtags=parser.hashtags or ["professional", "insights", "networking"],
+                call_to_action=parser.call_to_action or "What are your thoughts on this topic? Share your experience in the comments!"
             )
             
         except Exception as e:
@@ -187,6 +184,133 @@ class LinkedInPostAgent:
             call_to_action="What's your take on this? Let's discuss in the comments below!"
         )
 
+# --- Bulk Mode ---
+
+def read_rows(path: str) -> Iterator[dict]:
+    """
+    Stream the rows of a CSV (with a header row) or JSONL content calendar.
+
+    Each row needs a topic; language defaults to English. An "id" column identifies the
+    row (default: its position in the file) and any other columns are kept as options
+    and copied to the output.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith((".jsonl", ".json")):
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+        for number, record in enumerate(records, 1):
+            yield {
+                "id": str(record.get("id") or number),
+                "topic": str(record.get("topic") or "").strip(),
+                "language": str(record.get("language") or "").strip() or "English",
+                "options": {k: v for k, v in record.items() if k not in ("id", "topic", "language")},
+            }
+
+
+def row_hash(row: dict) -> str:
+    """Hash of everything that determines a row's post; a changed row is generated again."""
+    return make_cache_key(row["topic"], row["language"], MODEL_NAME or "", linkedin_post_prompt.template)
+
+
+async def generate_bulk(agent: LinkedInPostAgent, input_path: str, output_path: str, concurrency: int = 4):
+    """
+    Generate posts for every row of input_path with a bounded pool of workers.
+
+    Results are appended to output_path, in completion order, as soon as each post is
+    ready. The output is an append-only journal (see App/batch_journal.py), so an
+    interrupted run resumes where it stopped when the same command is run again: rows
+    already generated are skipped, failed rows are retried and rows with the same
+    content as a finished one reuse its post. The newest line for a row id wins.
+    While the model's circuit breaker is open the workers wait for it to let calls
+    through again instead of failing the remaining rows.
+    """
+    journal = BatchJournal(output_path)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    counts = {"generated": 0, "reused": 0, "failed": 0, "skipped": 0, "unrecorded": 0}
+    # Generations running in this run by hash, so duplicate rows share one model call
+    inflight: Dict[str, asyncio.Future] = {}
+
+    async def generate(row: dict, digest: str) -> dict:
+        post = journal.find(digest)
+        if post is not None:
+            counts["reused"] += 1
+            return post
+        if digest in inflight:
+            counts["reused"] += 1
+            return await asyncio.shield(inflight[digest])
+        async def generate_dict() -> dict:
+            while True:
+                try:
+                    post = await agent.generate_post(row["topic"], row["language"], fallback=False)
+                except CircuitOpenError as e:
+                    # An outage pauses the run rather than failing every remaining row
+                    delay = e.retry_after or 1.0
+                    print(f"⏸️ Model circuit is open, retrying row {row['id']} in {delay:.0f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                return post.model_dump()
+
+        # Holds the dict, so duplicate rows get the same JSON-ready post as this one
+        future = inflight[digest] = asyncio.ensure_future(generate_dict())
+        try:
+            post = await future
+        finally:
+            inflight.pop(digest, None)
+        counts["generated"] += 1
+        return post
+
+    async def worker():
+        while True:
+            row = await queue.get()
+            if row is None:
+                return
+            record = dict(row)
+            try:
+                if not row["topic"]:
+                    raise ValueError("Missing topic")
+                record["post"] = await generate(row, row["hash"])
+            except Exception as e:
+                record["error"] = str(e)
+                counts["failed"] += 1
+            try:
+                journal.append(record)
+            except Exception as e:
+                # Not in the journal, so the row is simply generated again by the next run
+                print(f"❌ Could not record row {row['id']} in {output_path}: {e}")
+                counts["unrecorded"] += 1
+            finished = counts["generated"] + counts["reused"] + counts["failed"]
+            if finished % 50 == 0:
+                print(f"🔄 {finished} rows processed ({counts['failed']} failed)")
+
+    async def produce():
+        # The bounded queue keeps only a few rows in memory however large the file is
+        for row in read_rows(input_path):
+            row["hash"] = row_hash(row)
+            if journal.is_done(row["id"], row["hash"]):
+                counts["skipped"] += 1
+                continue
+            await queue.put(row)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    tasks = [asyncio.ensure_future(produce())] + [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+    try:
+        # A worker that dies raises here instead of leaving the producer blocked on a full queue
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        journal.close()
+
+    print(
+        f"✅ Done: {counts['generated']} generated, {counts['reused']} reused, {counts['failed']} failed, "
+        f"{counts['skipped']} already done; results in {output_path}"
+    )
+    if counts["unrecorded"]:
+        print(f"⚠️ {counts['unrecorded']} rows could not be recorded and will be generated again on the next run")
+    return counts
+
 # --- Main Function ---
 
 async def main():
@@ -270,4 +394,14 @@ async def main():
             print(f"❌ Error: {str(e)}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    arg_parser = argparse.ArgumentParser(description="LinkedIn Post Generator Agent")
+    arg_parser.add_argument("--input", help="CSV or JSONL file of topic, language[, options] rows to generate in bulk")
+    arg_parser.add_argument("--output", help="JSONL file the bulk results are appended to (default: <input>.posts.jsonl)")
+    arg_parser.add_argument("--concurrency", type=int, default=4, help="posts generated at the same time in bulk mode")
+    args = arg_parser.parse_args()
+
+    if args.input:
+        output = args.output or os.path.splitext(args.input)[0] + ".posts.jsonl"
+        asyncio.run(generate_bulk(LinkedInPostAgent(), args.input, output, args.concurrency))
+    else:
+        asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""
+Admission control for upstream LLM calls.
+
+Limits how many model calls run at once and how many may wait for a slot, so a traffic
+spike sheds excess requests early (429/503 with Retry-After) instead of opening
+unbounded concurrent calls that all end up rate limited by the provider.
+"""
+
+import asyncio
+import math
+from contextlib import asynccontextmanager
+
+
+class OverloadedError(Exception):
+    """Raised when a request cannot be admitted; carries the HTTP status and Retry-After."""
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded concurrency gate with a bounded FIFO wait queue.
+
+    - At most max_in_flight callers hold a slot at the same time.
+    - At most max_queue callers wait for a slot; further callers get a 429 immediately.
+    - A caller that waits longer than queue_timeout seconds gets a 503.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = max(1, math.ceil(queue_timeout))
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        # Count admitted callers synchronously; the semaphore's own state lags behind
+        # when many callers arrive in the same event loop iteration.
+        if self.in_flight + self.waiting >= self.max_in_flight + self.max_queue:
+            raise OverloadedError(
+                "Too many requests in progress, please retry later", 429, self.retry_after
+            )
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise OverloadedError(
+                "Timed out waiting for a free generation slot", 503, self.retry_after
+            ) from None
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
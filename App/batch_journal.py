@@ -0,0 +1,59 @@
+"""
+Append-only journal for offline batch runs (see generate_bulk in App/Lnkedin_post_agent.py).
+
+Every processed row is appended as one JSON line holding its row id, the hash of what
+was generated (topic, language, model and prompt; see make_cache_key in App/cache.py) and
+the resulting post, or the error. Each line is flushed and fsynced before the next one,
+so after a crash the journal holds every finished row. Rerunning the batch replays it:
+rows whose id and hash match a recorded post are skipped, and a row whose content
+matches another recorded post reuses it, so no finished generation is paid for twice.
+"""
+
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+
+class BatchJournal:
+    def __init__(self, path: str):
+        self.path = path
+        # Latest successful result per row id, as (hash, post), and any post per hash
+        self._by_id: Dict[str, Tuple[str, dict]] = {}
+        self._by_hash: Dict[str, dict] = {}
+        self._load()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Last line cut short by a crash; the row is simply generated again
+                    continue
+                if record.get("post") and record.get("hash"):
+                    self._by_id[record["id"]] = (record["hash"], record["post"])
+                    self._by_hash[record["hash"]] = record["post"]
+
+    def is_done(self, row_id: str, row_hash: str) -> bool:
+        """True if this exact row (same id and content) already has a recorded post."""
+        done = self._by_id.get(row_id)
+        return done is not None and done[0] == row_hash
+
+    def find(self, row_hash: str) -> Optional[dict]:
+        """A recorded post for the same content under any row id, if there is one."""
+        return self._by_hash.get(row_hash)
+
+    def append(self, record: dict) -> None:
+        """Durably appends a processed row: {"id", "hash", ..., "post"} or {..., "error"}."""
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if record.get("post"):
+            self._by_id[record["id"]] = (record["hash"], record["post"])
+            self._by_hash[record["hash"]] = record["post"]
+
+    def close(self) -> None:
+        self._file.close()
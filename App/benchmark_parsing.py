@@ -0,0 +1,150 @@
+"""
+Micro-benchmarks for the per-response hot paths: parsing the labelled LLM output, building
+and serializing the LinkedInPost model and formatting it for display.
+
+Runs over a corpus of realistic and adversarial outputs (very long content, missing or
+lowercase labels, CRLF line endings, unlabelled text). Results can be saved as a JSON
+baseline and later runs compared against it to catch regressions.
+
+Usage (from the project root):
+    python -m App.benchmark_parsing
+    python -m App.benchmark_parsing --save baseline.json
+    python -m App.benchmark_parsing --compare baseline.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+# Neither agent calls the model here, but both read their settings at import
+os.environ.setdefault("API_KEY", "benchmark")
+os.environ.setdefault("BASE_URL", "http://127.0.0.1:9000")
+os.environ.setdefault("MODEL_NAME", "benchmark-model")
+os.environ.setdefault("USAGE_DB_PATH", "")
+os.environ.setdefault("CACHE_BACKEND", "none")
+os.environ.setdefault("JOB_BACKEND", "none")
+
+from . import main as api  # noqa: E402
+
+# The CLI agent uses top-level imports of its sibling modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import Lnkedin_post_agent as cli  # noqa: E402
+
+TOPIC = "AI in healthcare"
+
+REALISTIC = """TITLE: How AI Is Quietly Transforming Patient Care
+CONTENT: Hospitals are using machine learning to spot sepsis hours earlier than before.
+Radiology teams now triage scans with AI assistance, cutting wait times for urgent cases.
+The real change is cultural: clinicians who trust the tools use them, the rest ignore them.
+HASHTAGS: #AI, #Healthcare, #DigitalHealth, #Innovation
+CALL_TO_ACTION: Where have you seen AI make a real difference in care? Share below!"""
+
+LONG_CONTENT = (
+    "TITLE: A Long Read on AI in Healthcare\nCONTENT: "
+    + "\n".join(
+        f"Paragraph {i}: clinical decision support, triage, imaging and documentation all benefit "
+        f"from careful, well-governed use of machine learning in everyday practice."
+        for i in range(400)
+    )
+    + "\nHASHTAGS: AI, Healthcare, LongRead\nCALL_TO_ACTION: Did you make it to the end? Tell me!"
+)
+
+MISSING_LABELS = """Here is your LinkedIn post!
+
+TITLE: AI in Healthcare
+Hospitals are using machine learning to spot sepsis earlier.
+Radiology teams triage scans faster."""
+
+LOWERCASE_LABELS = REALISTIC.replace("TITLE:", "title:").replace("CONTENT:", "content:").replace(
+    "HASHTAGS:", "hashtags:"
+).replace("CALL_TO_ACTION:", "call_to_action:")
+
+CRLF = REALISTIC.replace("\n", "\r\n")
+
+UNLABELLED = " ".join(["AI is changing healthcare in many ways."] * 2000)
+
+CORPUS: Dict[str, str] = {
+    "realistic": REALISTIC,
+    "long_content": LONG_CONTENT,
+    "missing_labels": MISSING_LABELS,
+    "lowercase_labels": LOWERCASE_LABELS,
+    "crlf": CRLF,
+    "unlabelled": UNLABELLED,
+}
+
+
+def build_cases() -> List[Tuple[str, Callable[[], object]]]:
+    api_agent = api.LinkedInPostAgent()
+    cli_agent = object.__new__(cli.LinkedInPostAgent)  # parsing needs no chain or breaker
+
+    cases = []
+    for name, text in CORPUS.items():
+        post = api_agent._parse_output(text, TOPIC)
+        data = post.model_dump()
+        cases.extend([
+            (f"api._parse_output[{name}]", lambda t=text: api_agent._parse_output(t, TOPIC)),
+            (f"cli._parse_generated_content[{name}]",
+             lambda t=text: cli_agent._parse_generated_content(t, TOPIC, "English")),
+            (f"format_post[{name}]", post.format_post),
+            # Full validation, as for every parsed or cached post, vs. building without it
+            (f"model_validate[{name}]", lambda d=data: api.LinkedInPost.model_validate(d)),
+            (f"model_construct[{name}]", lambda d=data: api.LinkedInPost.model_construct(**d)),
+            (f"model_dump_json[{name}]", post.model_dump_json),
+        ])
+    return cases
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float) -> float:
+    """Best-of-repeat time per call in microseconds, auto-sizing the loop count to min_time."""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark post parsing and formatting")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing run")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="compare against a JSON file written with --save")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown ratio for --compare")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results: Dict[str, float] = {}
+    regressions = []
+    print(f"{'case':<48}{'µs/op':>12}{'baseline':>12}{'change':>9}")
+    for name, func in build_cases():
+        if args.filter not in name:
+            continue
+        results[name] = us = measure(func, args.repeat, args.min_time)
+        line = f"{name:<48}{us:>12.2f}"
+        if name in baseline:
+            change = us / baseline[name] - 1
+            line += f"{baseline[name]:>12.2f}{change:>+9.0%}"
+            if change > args.tolerance:
+                regressions.append(name)
+                line += "  ⚠️"
+        print(line)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"✅ Saved {len(results)} results to {args.save}")
+
+    if regressions:
+        print(f"❌ {len(regressions)} case(s) slower than baseline by more than {args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Response cache for generated LinkedIn posts.
+
+Posts are cached under a content-addressed key built from everything that influences
+the LLM output (topic, language, model and prompt template), so changing the model or
+the prompt automatically invalidates old entries.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def make_cache_key(topic: str, language: str, model_name: str, prompt_template: str, **options) -> str:
+    """Builds a stable hash for a generation request.
+
+    Topic and language are normalized (case and whitespace) so that trivially different
+    spellings of the same request share a cache entry. Extra options that change the
+    output (such as the number of variants) are part of the key when given.
+    """
+    normalized = {
+        "topic": " ".join(topic.split()).lower(),
+        "language": " ".join(language.split()).lower(),
+        "model": model_name,
+        "prompt": prompt_template,
+    }
+    if options:
+        normalized["options"] = options
+    payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryCache:
+    """In-process cache with a TTL per entry and LRU eviction."""
+
+    # Cheap enough to call from the event loop
+    blocking = False
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            # Mark as most recently used
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache:
+    """On-disk cache with the same TTL/LRU semantics, surviving process and container restarts.
+
+    Recency is tracked to the minute: a hit only writes last_used when the stored value is
+    older than that, so frequent hits on the same entry stay read-only.
+    """
+
+    # Disk I/O and lock waits: async callers should run these calls in a thread
+    blocking = True
+    LAST_USED_RESOLUTION = 60
+
+    def __init__(self, path: str, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL keeps readers in other worker processes from blocking on a writer (and vice versa)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS post_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS post_cache_last_used ON post_cache (last_used)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at, last_used FROM post_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at, last_used = row
+            if expires_at < now:
+                self._conn.execute("DELETE FROM post_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            if last_used < now - self.LAST_USED_RESOLUTION:
+                self._conn.execute("UPDATE post_cache SET last_used = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+            return json.loads(value)
+
+    def set(self, key: str, value: dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO post_cache (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now + self.ttl_seconds, now),
+            )
+            # Evict expired entries first, then the least recently used ones above the limit
+            self._conn.execute("DELETE FROM post_cache WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "DELETE FROM post_cache WHERE key IN ("
+                " SELECT key FROM post_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM post_cache")
+            self._conn.commit()
+
+
+def create_cache(backend: str, max_entries: int, ttl_seconds: float, path: str = "post_cache.sqlite3"):
+    """Creates the cache configured by CACHE_BACKEND ("memory", "sqlite" or "none")."""
+    backend = backend.lower()
+    if backend == "none" or ttl_seconds <= 0 or max_entries <= 0:
+        return None
+    if backend == "sqlite":
+        return SQLiteCache(path, max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if backend == "memory":
+        return MemoryCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    raise ValueError(f"❌ Unknown CACHE_BACKEND '{backend}' (expected memory, sqlite or none)")
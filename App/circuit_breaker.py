@@ -0,0 +1,68 @@
+"""
+Circuit breaker for upstream model calls.
+
+closed     -> calls pass; failure_threshold consecutive failures open the circuit
+open       -> calls are refused until reset_timeout seconds have passed
+half-open  -> a single probe call is let through; success closes the circuit,
+              failure opens it again for another reset_timeout
+"""
+
+import time
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through (0 if calls are allowed now)."""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def available(self) -> bool:
+        """True if allow_request() would currently let a call through (does not change state)."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return self.retry_after() == 0
+        return not self._probe_in_flight
+
+    def allow_request(self) -> bool:
+        """Checks whether a call may be made now; in half-open state this claims the probe."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if self.retry_after() > 0:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Frees a claimed half-open probe whose call ended without a verdict (e.g. cancelled)."""
+        self._probe_in_flight = False
@@ -0,0 +1,351 @@
+"""
+Persistent job queue and in-process worker pool for asynchronous generations.
+
+POST /jobs stores the request and returns at once; workers claim queued jobs, run the
+generation and store the result for GET /jobs/{id}/result. Callers poll instead of
+holding a connection (and an nginx/uvicorn slot) open for the whole generation.
+
+Jobs are stored in SQLite by default, or in Redis (pip install redis) to share the queue
+between hosts. A claimed job holds a lease; if its worker dies, the job is claimed
+again once the lease expires, so several processes can safely share one queue.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from .admission import OverloadedError
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+class SQLiteJobStore:
+    """Job queue in a local SQLite file, shared by the worker processes of one host.
+
+    sqlite3 calls block, so every operation runs in a thread off the event loop.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 900, ttl_seconds: float = 86400):
+        self.lease_seconds = lease_seconds
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # Autocommit mode, so claim() can take the write lock up front with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        # WAL lets the idle workers' polling reads run alongside a writer
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " result TEXT,"
+            " error TEXT,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL,"
+            " lease_until REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+
+    async def enqueue(self, job_id: str, payload: dict) -> None:
+        await asyncio.to_thread(self._enqueue, job_id, json.dumps(payload, ensure_ascii=False))
+
+    async def claim(self) -> Optional[Tuple[str, dict]]:
+        """Takes the oldest queued job (or one whose worker's lease expired) and marks it running."""
+        row = await asyncio.to_thread(self._claim)
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    async def complete(self, job_id: str, result: dict) -> None:
+        await asyncio.to_thread(
+            self._finish, job_id, "succeeded", json.dumps(result, ensure_ascii=False), None
+        )
+
+    async def fail(self, job_id: str, error: str) -> None:
+        await asyncio.to_thread(self._finish, job_id, "failed", None, error)
+
+    async def release(self, job_id: str) -> None:
+        """Puts a claimed job back in the queue (shutdown, or rejected by admission control)."""
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE jobs SET status = 'queued', lease_until = NULL WHERE id = ? AND status = 'running'",
+            (job_id,),
+        )
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        row = await asyncio.to_thread(
+            self._fetchone,
+            "SELECT status, result, error, attempts, created_at, started_at, finished_at FROM jobs WHERE id = ?",
+            (job_id,),
+        )
+        if row is None:
+            return None
+        status, result, error, attempts, created_at, started_at, finished_at = row
+        return {
+            "job_id": job_id,
+            "status": status,
+            "result": json.loads(result) if result else None,
+            "error": error,
+            "attempts": attempts,
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+        }
+
+    async def queued_count(self) -> int:
+        row = await asyncio.to_thread(self._fetchone, "SELECT COUNT(*) FROM jobs WHERE status = 'queued'", ())
+        return row[0]
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, sql: str, params: tuple) -> None:
+        with self._lock:
+            self._conn.execute(sql, params)
+
+    def _fetchone(self, sql: str, params: tuple) -> Optional[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _enqueue(self, job_id: str, payload: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, payload, created_at) VALUES (?, 'queued', ?, ?)",
+                (job_id, payload, now),
+            )
+            # Finished jobs are kept for ttl_seconds so their results can be fetched
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?",
+                (now - self.ttl_seconds,),
+            )
+
+    def _claim(self) -> Optional[Tuple[str, str]]:
+        now = time.time()
+        claimable = (
+            " WHERE status = 'queued' OR (status = 'running' AND lease_until < ?)"
+            " ORDER BY created_at LIMIT 1"
+        )
+        with self._lock:
+            # Idle workers poll every second: check with a plain read before taking the write lock
+            if self._conn.execute("SELECT 1 FROM jobs" + claimable, (now,)).fetchone() is None:
+                return None
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT id, payload FROM jobs" + claimable, (now,)).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', started_at = ?, lease_until = ?,"
+                        " attempts = attempts + 1 WHERE id = ?",
+                        (now, now + self.lease_seconds, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row
+
+    def _finish(self, job_id: str, status: str, result: Optional[str], error: Optional[str]) -> None:
+        self._execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL WHERE id = ?",
+            (status, result, error, time.time(), job_id),
+        )
+
+
+class RedisJobStore:
+    """Job queue in Redis: a list of queued ids, a sorted set of leases and a hash per job."""
+
+    def __init__(self, url: str, lease_seconds: float = 900, ttl_seconds: float = 86400, prefix: str = "linkedin_jobs"):
+        import redis.asyncio as redis
+
+        self.lease_seconds = lease_seconds
+        self.ttl_seconds = ttl_seconds
+        self._redis = redis.from_url(url, decode_responses=True)
+        self._queue = f"{prefix}:queue"
+        self._running = f"{prefix}:running"
+        self._prefix = prefix
+
+    def _key(self, job_id: str) -> str:
+        return f"{self._prefix}:job:{job_id}"
+
+    async def enqueue(self, job_id: str, payload: dict) -> None:
+        key = self._key(job_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={
+                "status": "queued",
+                "payload": json.dumps(payload, ensure_ascii=False),
+                "attempts": 0,
+                "created_at": time.time(),
+            })
+            pipe.lpush(self._queue, job_id)
+            await pipe.execute()
+
+    async def claim(self) -> Optional[Tuple[str, dict]]:
+        now = time.time()
+        expired = await self._redis.zrangebyscore(self._running, "-inf", now, start=0, num=1)
+        # ZREM succeeds for exactly one of the workers racing for the same expired job
+        if expired and await self._redis.zrem(self._running, expired[0]):
+            job_id = expired[0]
+        else:
+            job_id = await self._redis.rpop(self._queue)
+            if job_id is None:
+                return None
+        key = self._key(job_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(self._running, {job_id: now + self.lease_seconds})
+            pipe.hset(key, mapping={"status": "running", "started_at": now})
+            pipe.hincrby(key, "attempts", 1)
+            pipe.hget(key, "payload")
+            payload = (await pipe.execute())[-1]
+        return job_id, json.loads(payload)
+
+    async def complete(self, job_id: str, result: dict) -> None:
+        await self._finish(job_id, {"status": "succeeded", "result": json.dumps(result, ensure_ascii=False)})
+
+    async def fail(self, job_id: str, error: str) -> None:
+        await self._finish(job_id, {"status": "failed", "error": error})
+
+    async def release(self, job_id: str) -> None:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self._running, job_id)
+            pipe.hset(self._key(job_id), "status", "queued")
+            pipe.rpush(self._queue, job_id)
+            await pipe.execute()
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        fields = await self._redis.hgetall(self._key(job_id))
+        if not fields:
+            return None
+
+        def number(name):
+            return float(fields[name]) if fields.get(name) else None
+
+        return {
+            "job_id": job_id,
+            "status": fields["status"],
+            "result": json.loads(fields["result"]) if fields.get("result") else None,
+            "error": fields.get("error"),
+            "attempts": int(fields.get("attempts", 0)),
+            "created_at": number("created_at"),
+            "started_at": number("started_at"),
+            "finished_at": number("finished_at"),
+        }
+
+    async def queued_count(self) -> int:
+        return await self._redis.llen(self._queue)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+    async def _finish(self, job_id: str, fields: dict) -> None:
+        key = self._key(job_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self._running, job_id)
+            pipe.hset(key, mapping={**fields, "finished_at": time.time()})
+            pipe.expire(key, int(self.ttl_seconds))
+            await pipe.execute()
+
+
+def create_job_store(backend: str, path: str, redis_url: str, lease_seconds: float, ttl_seconds: float):
+    """Creates the job store configured by JOB_BACKEND ("sqlite", "redis" or "none")."""
+    backend = backend.lower()
+    if backend == "none":
+        return None
+    if backend == "sqlite":
+        return SQLiteJobStore(path, lease_seconds=lease_seconds, ttl_seconds=ttl_seconds)
+    if backend == "redis":
+        try:
+            return RedisJobStore(redis_url, lease_seconds=lease_seconds, ttl_seconds=ttl_seconds)
+        except ImportError:
+            raise ValueError("❌ JOB_BACKEND=redis requires the 'redis' package (pip install redis)") from None
+    raise ValueError(f"❌ Unknown JOB_BACKEND '{backend}' (expected sqlite, redis or none)")
+
+
+class JobWorkerPool:
+    """Runs queued jobs with a fixed number of worker tasks in the current event loop.
+
+    Each worker claims one job at a time and stores the handler's result (or its error).
+    Jobs rejected by admission control are put back in the queue and retried after the
+    Retry-After delay; jobs interrupted by shutdown are put back for the next process.
+    """
+
+    def __init__(
+        self,
+        store,
+        handler: Callable[[dict], Awaitable[dict]],
+        workers: int = 4,
+        poll_interval: float = 1.0,
+    ):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._tasks = [asyncio.ensure_future(self._run()) for _ in range(self.workers)]
+
+    def notify(self) -> None:
+        """Wakes idle workers after a job was enqueued by this process."""
+        self._wakeup.set()
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _idle(self, delay: float) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                job = await self.store.claim()
+            except Exception:
+                print(traceback.format_exc())
+                job = None
+            if job is None:
+                await self._idle(self.poll_interval)
+                continue
+
+            job_id, payload = job
+            try:
+                result = await self.handler(payload)
+            except asyncio.CancelledError:
+                await self._store_call(self.store.release(job_id))
+                raise
+            except OverloadedError as e:
+                await self._store_call(self.store.release(job_id))
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                print(traceback.format_exc())
+                await self._store_call(self.store.fail(job_id, str(e)))
+            else:
+                await self._store_call(self.store.complete(job_id, result))
+
+    async def _store_call(self, call: Awaitable[None]) -> None:
+        """Awaits a store update, logging its errors so they cannot end the worker.
+
+        A job whose update is lost (e.g. "database is locked", Redis unreachable) stays
+        running until its lease expires and is then claimed again.
+        """
+        try:
+            await call
+        except Exception:
+            print(traceback.format_exc())
@@ -0,0 +1,235 @@
+"""
+Load test and latency benchmark for the LinkedIn Post Generator API.
+
+Starts the mock LLM server (App/mock_llm_server.py) and the API (App.main:app) as local
+subprocesses, points the API's BASE_URL at the mock, then drives the selected routes at a
+fixed concurrency and reports throughput and p50/p95/p99 latency. No real model is called,
+so runs are reproducible and free; the numbers measure this service's own overhead on
+top of the simulated model latency.
+
+Usage (from the project root):
+    python -m App.load_test --concurrency 32 --requests 500
+    python -m App.load_test --routes generate_stream --latency-median 0.5 --token-rate 200
+    python -m App.load_test --workers 4          # API under App.serve with 4 workers
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+ROUTES = ("generate", "generate_formatted", "generate_batch", "generate_stream")
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """Nearest-rank percentile of the samples (0 if there are none)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class RouteResult:
+    def __init__(self, route: str):
+        self.route = route
+        self.latencies: List[float] = []
+        self.first_byte: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.items = 0
+        self.elapsed = 0.0
+
+    def add_error(self, kind: str) -> None:
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+def _start(args: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, *args], env=env)
+
+
+async def _wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"❌ Server for {url} exited with code {process.returncode}")
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"❌ Server at {url} did not start within {timeout}s")
+
+
+async def _call(client: httpx.AsyncClient, route: str, topic: str, batch_size: int, result: RouteResult) -> None:
+    started = time.perf_counter()
+    try:
+        if route == "generate_batch":
+            body = [{"topic": f"{topic} #{i}", "language": "English"} for i in range(batch_size)]
+        else:
+            body = {"topic": topic, "language": "English"}
+
+        if route == "generate_stream":
+            async with client.stream("POST", f"/{route}", json=body) as response:
+                if response.status_code != 200:
+                    result.add_error(str(response.status_code))
+                    return
+                first = True
+                failed = False
+                async for line in response.aiter_lines():
+                    if first:
+                        result.first_byte.append(time.perf_counter() - started)
+                        first = False
+                    if line == "event: error":
+                        failed = True
+                if failed:
+                    result.add_error("stream_error")
+                    return
+        else:
+            response = await client.post(f"/{route}", json=body)
+            if response.status_code != 200:
+                result.add_error(str(response.status_code))
+                return
+            payload = response.json()
+            if route == "generate_batch":
+                failed = sum(1 for item in payload if item.get("error"))
+                if failed:
+                    result.add_error("batch_item_error")
+            elif isinstance(payload, dict) and payload.get("error"):
+                result.add_error("error_body")
+                return
+    except httpx.HTTPError as e:
+        result.add_error(type(e).__name__)
+        return
+
+    result.latencies.append(time.perf_counter() - started)
+    result.items += batch_size if route == "generate_batch" else 1
+
+
+async def run_route(base_url: str, route: str, requests: int, concurrency: int, batch_size: int,
+                    distinct_topics: Optional[int]) -> RouteResult:
+    result = RouteResult(route)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=300) as client:
+        counter = iter(range(requests))
+
+        async def worker():
+            for i in counter:
+                # Unique topics by default so the response cache and request coalescing
+                # do not hide the cost of generation; --distinct-topics exercises them
+                topic_id = i % distinct_topics if distinct_topics else i
+                await _call(client, route, f"Load test topic {route} {topic_id}", batch_size, result)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        result.elapsed = time.perf_counter() - started
+    return result
+
+
+def print_report(results: List[RouteResult]) -> None:
+    header = f"{'route':<20}{'ok':>7}{'errors':>8}{'posts/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ttfb p50':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        throughput = r.items / r.elapsed if r.elapsed else 0.0
+        ttfb = f"{percentile(r.first_byte, 50) * 1000:.0f}" if r.first_byte else "-"
+        print(
+            f"{r.route:<20}{len(r.latencies):>7}{sum(r.errors.values()):>8}{throughput:>10.1f}"
+            f"{percentile(r.latencies, 50) * 1000:>10.0f}{percentile(r.latencies, 95) * 1000:>10.0f}"
+            f"{percentile(r.latencies, 99) * 1000:>10.0f}{ttfb:>10}"
+        )
+        if r.errors:
+            print(f"{'':<20}errors: {json.dumps(r.errors)}")
+
+
+async def main_async(args) -> None:
+    mock_url = f"http://127.0.0.1:{args.mock_port}"
+    api_url = f"http://127.0.0.1:{args.api_port}"
+
+    env = dict(os.environ)
+    mock = _start(
+        [
+            "-m", "App.mock_llm_server", "--port", str(args.mock_port),
+            "--latency-median", str(args.latency_median), "--latency-sigma", str(args.latency_sigma),
+            "--token-rate", str(args.token_rate), "--error-rate", str(args.error_rate), "--seed", str(args.seed),
+        ],
+        env,
+    )
+
+    api_env = dict(env)
+    api_env.update({
+        "BASE_URL": mock_url,
+        "API_KEY": "mock",
+        "LLM_BACKENDS": "",
+        "CACHE_BACKEND": args.cache_backend,
+        "USAGE_DB_PATH": "",
+        "JOB_BACKEND": "none",
+        "TRACING_EXPORTER": "none",
+        "PORT": str(args.api_port),
+        "HOST": "127.0.0.1",
+        "WEB_CONCURRENCY": str(args.workers),
+    })
+    if args.workers > 1:
+        api = _start(["-m", "App.serve"], api_env)
+    else:
+        api = _start(
+            ["-m", "uvicorn", "App.main:app", "--host", "127.0.0.1", "--port", str(args.api_port),
+             "--log-level", "warning", "--no-access-log"],
+            api_env,
+        )
+
+    try:
+        await _wait_until_ready(f"{mock_url}/docs", mock)
+        await _wait_until_ready(f"{api_url}/", api)
+        print(
+            f"🚀 Load test: {args.requests} requests/route, concurrency {args.concurrency}, "
+            f"mock TTFT median {args.latency_median}s, {args.token_rate} tok/s, error rate {args.error_rate}"
+        )
+        results = []
+        for route in args.routes.split(","):
+            route = route.strip()
+            if route not in ROUTES:
+                raise SystemExit(f"❌ Unknown route '{route}' (choose from {', '.join(ROUTES)})")
+            results.append(await run_route(
+                api_url, route, args.requests, args.concurrency, args.batch_size, args.distinct_topics
+            ))
+        print_report(results)
+    finally:
+        for process in (api, mock):
+            process.terminate()
+        for process in (api, mock):
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API against a mock LLM server")
+    parser.add_argument("--routes", default=",".join(ROUTES), help="comma-separated routes to drive")
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=10, help="topics per /generate_batch request")
+    parser.add_argument("--distinct-topics", type=int, default=None,
+                        help="reuse this many topics (exercises cache/coalescing); default all unique")
+    parser.add_argument("--cache-backend", default="none", help="CACHE_BACKEND for the API under test")
+    parser.add_argument("--workers", type=int, default=1, help="API worker processes (>1 uses App.serve)")
+    parser.add_argument("--api-port", type=int, default=8100)
+    parser.add_argument("--mock-port", type=int, default=9100)
+    parser.add_argument("--latency-median", type=float, default=0.5)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--token-rate", type=float, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,164 @@
 import os
-from typing import List
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+import json
+import time
+import asyncio
+from contextlib import asynccontextmanager, nullcontext
+from typing import AsyncIterator, Awaitable, Dict, List, Optional, Tuple, Union
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, PrivateAttr, field_validator, model_validator
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+import httpx
 from langchain.prompts import PromptTemplate
 from langchain.schema.output_parser import StrOutputParser
 from langchain.schema.runnable import RunnablePassthrough
 from fastapi.middleware.cors import CORSMiddleware
 import traceback # Used for logging exceptions
+from . import metrics
+from .admission import AdmissionController, OverloadedError
+from .cache import create_cache, make_cache_key
+from .jobs import JobWorkerPool, create_job_store, new_job_id
+from .post_parser import StreamingPostParser, StructuredPostParser, split_posts
+from .rate_limit import ProviderRateLimiter
+from .circuit_breaker import CircuitBreaker
+from .retry import HedgePolicy, RetryPolicy, is_retryable
+from .router import BackendRouter, BackendUnavailableError, parse_backends
+from .tracing import TracingCallbackHandler, setup_tracing, start_request_span, tracing_enabled
+from .usage import (
+    RequestUsage,
+    UsageCallbackHandler,
+    add_request_usage,
+    track_language_usage,
+    track_request_usage,
+)
+from .usage_store import UsageStore
 
 # --- Load environment variables and initial setup ---
 load_dotenv()
 BASE_URL = os.getenv("BASE_URL", "https://models.github.ai/inference")
 API_KEY = os.getenv("API_KEY", "")
 MODEL_NAME = os.getenv("MODEL_NAME", "gpt-4o-mini")
+# Optional JSON list of backends to balance across, e.g.
+# [{"base_url": "http://ollama-1:11434/v1", "api_key": "ollama", "model_name": "llama3"}, ...]
+# Missing keys default to BASE_URL / API_KEY / MODEL_NAME; unset means just that one backend.
+LLM_BACKENDS = os.getenv("LLM_BACKENDS", "")
+BACKEND_EWMA_ALPHA = float(os.getenv("BACKEND_EWMA_ALPHA", "0.3"))
+# Consecutive failures that take a backend out of rotation, and seconds before it is probed again
+BACKEND_FAILURE_THRESHOLD = int(os.getenv("BACKEND_FAILURE_THRESHOLD", "3"))
+BACKEND_RESET_TIMEOUT = float(os.getenv("BACKEND_RESET_TIMEOUT", "30"))
+# Whole-upstream circuit breaker: after this many consecutive failed generations, posts are
+# answered with the fallback post without calling the model until a probe after
+# CIRCUIT_RESET_TIMEOUT seconds succeeds
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+# How the model returns the post: "labels" (TITLE:/CONTENT:/... lines parsed from plain text,
+# works with any chat model) or, where the provider supports it, "json_schema" (structured
+# outputs) / "function_calling" (tool call), which return the post fields as validated JSON
+OUTPUT_MODE = os.getenv("OUTPUT_MODE", "labels")
+if OUTPUT_MODE not in ("labels", "json_schema", "function_calling"):
+    raise ValueError("❌ OUTPUT_MODE must be one of: labels, json_schema, function_calling")
+# Extra model calls allowed per generation to fill in sections missing from the output
+# (asking only for those sections) before falling back to default values; 0 disables repair
+REPAIR_MAX_CALLS = int(os.getenv("REPAIR_MAX_CALLS", "1"))
+# Most post variants a single request may ask for (generated in one model call)
+MAX_VARIANTS = int(os.getenv("MAX_VARIANTS", "5"))
+# Most languages one request may ask for; the post is generated in the first language and
+# translated into the others in parallel
+MAX_LANGUAGES = int(os.getenv("MAX_LANGUAGES", "10"))
+# Upper bound on completion tokens per post (also used to estimate rate-limit usage)
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "1024"))
+# Maximum number of posts generated at the same time by /generate_batch
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+# Maximum number of items accepted in one /generate_batch request
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "100"))
+# Response cache: "memory", "sqlite" (persistent, stored at CACHE_PATH) or "none"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_PATH = os.getenv("CACHE_PATH", "post_cache.sqlite3")
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+# Connection pool shared by all requests to BASE_URL
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "120"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")
+# Admission control: concurrent LLM calls, calls allowed to wait for a slot, and max wait
+MAX_IN_FLIGHT_LLM_CALLS = int(os.getenv("MAX_IN_FLIGHT_LLM_CALLS", "32"))
+MAX_QUEUED_LLM_CALLS = int(os.getenv("MAX_QUEUED_LLM_CALLS", "128"))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("QUEUE_TIMEOUT_SECONDS", "30"))
+# Provider budgets paced client-side (0 = unlimited) and the burst allowed, in seconds of budget.
+# The budgets are for the whole service; each of the WEB_CONCURRENCY worker processes
+# (the default worker count of App.serve and of uvicorn) paces its own share
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+RATE_LIMIT_RPM = float(os.getenv("RATE_LIMIT_RPM", "0")) / WEB_CONCURRENCY
+RATE_LIMIT_TPM = float(os.getenv("RATE_LIMIT_TPM", "0")) / WEB_CONCURRENCY
+RATE_LIMIT_BURST_SECONDS = float(os.getenv("RATE_LIMIT_BURST_SECONDS", "10"))
+# Retries of timeouts, 429 and 5xx with full-jitter exponential backoff
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "8"))
+# Total seconds a generation may spend on attempts and backoff; no retry is started that
+# could run past it with a full HTTP_READ_TIMEOUT. Keep it below the proxy's read timeout
+# (proxy_read_timeout 300s in nginx.conf), so clients never get a 504 while we still retry
+LLM_RETRY_BUDGET_SECONDS = float(os.getenv("LLM_RETRY_BUDGET_SECONDS", "270"))
+# Hedging: start a second call when the first has no token after the HEDGE_PERCENTILE
+# of recent time-to-first-token (once HEDGE_MIN_SAMPLES calls have been observed)
+HEDGING_ENABLED = os.getenv("HEDGING_ENABLED", "false").lower() in ("1", "true", "yes")
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.5"))
+
+# Token usage accounting per client and day (GET /usage); empty USAGE_DB_PATH disables it.
+# Costs are per 1000 tokens, in whatever currency the provider bills.
+USAGE_DB_PATH = os.getenv("USAGE_DB_PATH", "usage.sqlite3")
+PROMPT_TOKEN_COST_PER_1K = float(os.getenv("PROMPT_TOKEN_COST_PER_1K", "0"))
+COMPLETION_TOKEN_COST_PER_1K = float(os.getenv("COMPLETION_TOKEN_COST_PER_1K", "0"))
+# Asynchronous jobs (POST /jobs): queue backend "sqlite" (JOB_DB_PATH), "redis" (JOB_REDIS_URL,
+# needs the 'redis' package) or "none", worker tasks per process, and the queued jobs
+# accepted before POST /jobs answers 429. A job whose worker died is retried after
+# JOB_LEASE_SECONDS; finished jobs are kept JOB_TTL_SECONDS.
+JOB_BACKEND = os.getenv("JOB_BACKEND", "sqlite")
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "jobs.sqlite3")
+JOB_REDIS_URL = os.getenv("JOB_REDIS_URL", "redis://localhost:6379/0")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "1000"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "900"))
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", "86400"))
+# OpenTelemetry span export: "console", "file" (JSON lines appended to TRACING_FILE) or "none"
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
 
-if not API_KEY:
-    raise ValueError("❌ Please set your API_KEY in the .env file")
+setup_tracing(TRACING_EXPORTER, TRACING_FILE)
 
 # --- FastAPI Initialization and CORS Configuration ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Opens the usage and job stores and starts the job workers; closes them and the LLM clients on shutdown."""
+    global job_store, job_pool, usage_store
+    # Opened here rather than at import, so importing the app creates no database file
+    if USAGE_DB_PATH:
+        usage_store = UsageStore(USAGE_DB_PATH, PROMPT_TOKEN_COST_PER_1K, COMPLETION_TOKEN_COST_PER_1K)
+    job_store = create_job_store(JOB_BACKEND, JOB_DB_PATH, JOB_REDIS_URL, JOB_LEASE_SECONDS, JOB_TTL_SECONDS)
+    if job_store is not None:
+        job_pool = JobWorkerPool(job_store, _run_job, workers=JOB_WORKERS)
+        job_pool.start()
+    yield
+    if job_pool is not None:
+        await job_pool.stop()
+        await job_store.close()
+        job_store = job_pool = None
+    if usage_store is not None:
+        usage_store.close()
+        usage_store = None
+    await llm_registry.aclose()
+
+
 app = FastAPI(
     title="LinkedIn Post Generator API",
     description="Generate professional LinkedIn posts using LangChain and OpenAI (GPT-4o-mini).",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS FIX: Allow all origins so the local HTML file can connect
@@ -37,12 +172,35 @@ app.add_middleware(
 )
 
 
+async def trace_requests(request, call_next):
+    """Wraps each request in a server span continuing the trace from the traceparent header."""
+    with start_request_span(request.method, request.url.path, request.headers) as span:
+        # nginx sets X-Request-ID so traces can be matched with its access log
+        request_id = request.headers.get("x-request-id")
+        if request_id:
+            span.set_attribute("http.request_id", request_id)
+        response = await call_next(request)
+        span.set_attribute("http.status_code", response.status_code)
+        return response
+
+
+# Only installed with tracing on: every HTTP middleware adds per-request overhead
+if tracing_enabled():
+    app.middleware("http")(trace_requests)
+
+
 # --- LinkedIn Post Model (Pydantic) ---
 class LinkedInPost(BaseModel):
     title: str = Field(description="Catchy headline for the post")
     content: str = Field(description="Main post body (2–4 paragraphs)")
     hashtags: List[str] = Field(description="Relevant hashtags")
     call_to_action: str = Field(description="Encouraging call to action")
+    # Set on the canned post served while the upstream is down; not part of the JSON body
+    _fallback: bool = PrivateAttr(default=False)
+
+    @property
+    def is_fallback(self) -> bool:
+        return self._fallback
 
     def format_post(self) -> str:
         """Formats the structured data into a ready-to-use LinkedIn post string."""
@@ -55,12 +213,31 @@ class LinkedInPost(BaseModel):
 
 
 # --- LangChain Setup ---
-llm = ChatOpenAI(
-    base_url=BASE_URL,
-    api_key=API_KEY,
-    model=MODEL_NAME,
-    temperature=0.7,
-)
+def create_http_client() -> httpx.AsyncClient:
+    """Creates the pooled keep-alive HTTP client used for every call to the model API.
+
+    HTTP/2 is used when enabled and the optional 'h2' package is installed
+    (pip install "httpx[http2]"); otherwise the client falls back to HTTP/1.1.
+    """
+    http2 = HTTP2_ENABLED
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("⚠️ HTTP2_ENABLED is set but the 'h2' package is missing; using HTTP/1.1")
+            http2 = False
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=http_timeout,
+    )
+
+
+http_timeout = httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
 
 prompt_template = """
 You are a professional LinkedIn content creator.
@@ -88,82 +265,940 @@ prompt = PromptTemplate(
     template=prompt_template
 )
 
-# Use LCEL (LangChain Expression Language) for the chain: prompt | model | output_parser
-# This replaces the deprecated LLMChain and automatically returns the string output.
-post_chain = (
-    RunnablePassthrough.assign(
+# Structured output mode: the response format / tool schema defines the fields instead of labels
+structured_prompt_template = """
+You are a professional LinkedIn content creator.
+Create an engaging LinkedIn post about the topic below.
+
+Topic: {topic}
+Language: {language}
+
+Rules:
+1. 2–4 engaging paragraphs for the content, separated by blank lines.
+2. Include a catchy title.
+3. Add relevant hashtags (3–5), without the '#' symbol.
+4. Add a specific call-to-action.
+5. Write everything in {language}.
+"""
+
+structured_prompt = PromptTemplate(
+    input_variables=["topic", "language"],
+    template=structured_prompt_template
+)
+
+# The prompt in use for OUTPUT_MODE (also part of the cache key)
+post_prompt_template = prompt_template if OUTPUT_MODE == "labels" else structured_prompt_template
+post_prompt = prompt if OUTPUT_MODE == "labels" else structured_prompt
+
+# Repair call: asks only for the sections the first completion was missing
+repair_prompt_template = """
+You are a professional LinkedIn content creator.
+A LinkedIn post about the topic below is missing some sections.
+
+Topic: {topic}
+Language: {language}
+
+Post so far:
+{post}
+
+Write only the missing sections, in {language}, using exactly these labels, one per line:
+{sections}
+"""
+
+repair_prompt = PromptTemplate(
+    input_variables=["topic", "language", "post", "sections"],
+    template=repair_prompt_template
+)
+
+# Label line requested for each missing section, and how present sections are shown
+_SECTION_LABELS = {
+    "title": "TITLE: <Your catchy headline>",
+    "content": "CONTENT: <Your 2-4 paragraph post body>",
+    "hashtags": "HASHTAGS: <comma-separated list of tags, e.g., tag1, tag2, tag3>",
+    "call_to_action": "CALL_TO_ACTION: <Your specific call-to-action>",
+}
+
+
+# Variants: several posts for A/B testing from one completion, sharing the instruction prompt
+variants_prompt_template = """
+You are a professional LinkedIn content creator.
+Create {variants} different LinkedIn posts about the topic below, each with its own angle and hook.
+
+Topic: {topic}
+Language: {language}
+
+Rules for every post:
+1. 2–4 engaging paragraphs for the content section.
+2. Include a catchy title.
+3. Add relevant hashtags (3–5).
+4. Add a specific call-to-action.
+5. Write everything in {language}.
+
+Start each post with its number on its own line and format it strictly using the following labels, one per line:
+POST 1:
+TITLE: <Your catchy headline>
+CONTENT: <Your 2-4 paragraph post body>
+HASHTAGS: <comma-separated list of tags, e.g., tag1, tag2, tag3>
+CALL_TO_ACTION: <Your specific call-to-action>
+POST 2:
+...
+"""
+
+variants_prompt = PromptTemplate(
+    input_variables=["topic", "language", "variants"],
+    template=variants_prompt_template
+)
+
+
+def build_variants_chain(llm, posts: int = MAX_VARIANTS):
+    """Builds the chain for multi-post calls; always plain labelled text, whatever OUTPUT_MODE is."""
+    # Room for every requested post, matching the rate limiter's estimate for the call
+    return variants_prompt | llm.bind(max_tokens=LLM_MAX_TOKENS * posts) | StrOutputParser()
+
+
+# Translation of a generated post for multi-language requests
+translate_prompt_template = """
+You are a professional LinkedIn content creator and translator.
+Translate the LinkedIn post below from {source_language} into {language}. Keep its meaning,
+tone and structure, but adapt idioms and hashtags so it reads naturally to a
+{language}-speaking professional audience.
+
+{post}
+
+Format the output strictly using the following labels, one per line:
+TITLE: <Translated headline>
+CONTENT: <Translated post body>
+HASHTAGS: <comma-separated list of tags, e.g., tag1, tag2, tag3>
+CALL_TO_ACTION: <Translated call-to-action>
+"""
+
+translate_prompt = PromptTemplate(
+    input_variables=["source_language", "language", "post"],
+    template=translate_prompt_template
+)
+
+
+def build_translate_chain(llm):
+    """Builds the chain for translating a generated post; always plain labelled text."""
+    return translate_prompt | llm | StrOutputParser()
+
+
+def _format_sections(parser) -> str:
+    """Renders the sections a parser found as labelled lines, for the repair prompt."""
+    lines = []
+    for field in _SECTION_LABELS:
+        value = getattr(parser, field)
+        if value:
+            lines.append(f"{field.upper()}: {', '.join(value) if isinstance(value, list) else value}")
+    return "\n".join(lines) or "(empty)"
+
+
+def _is_complete(parser) -> bool:
+    """True if the model supplied every section, so no default text will be filled in."""
+    return all(getattr(parser, field) for field in _SECTION_LABELS)
+
+
+def build_repair_chain(llm):
+    """Builds the chain for repair calls; always plain labelled text, whatever OUTPUT_MODE is."""
+    return repair_prompt | llm | StrOutputParser()
+
+
+def build_post_chain(llm):
+    """Builds the generation chain for the given chat model.
+
+    In "labels" mode the chain returns the raw text; in structured output modes it returns
+    a dict of the LinkedInPost fields (partial dicts while streaming).
+    """
+    inputs = RunnablePassthrough.assign(
         topic=lambda x: x["topic"], 
         language=lambda x: x["language"]
     )
-    | prompt
-    | llm
-    | StrOutputParser()
-)
+    if OUTPUT_MODE != "labels":
+        # The JSON schema (rather than the model class) makes the parser stream partial dicts
+        return inputs | structured_prompt | llm.with_structured_output(
+            LinkedInPost.model_json_schema(), method=OUTPUT_MODE
+        )
+    # Use LCEL (LangChain Expression Language) for the chain: prompt | model | output_parser
+    # This replaces the deprecated LLMChain and automatically returns the string output.
+    return (
+        inputs
+        | prompt
+        | llm
+        | StrOutputParser()
+    )
+
+
+class LLMClientRegistry:
+    """Lazily creates and reuses one ChatOpenAI client and chain per backend configuration.
+
+    Nothing is built at import time: langchain_openai is only imported, and API_KEY only
+    checked, when the first generation needs a chain. This keeps startup and health
+    checks fast and lets tooling import the module without credentials or network.
+    """
+
+    def __init__(self):
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._llms: Dict[Tuple[str, str, str], object] = {}
+        self._chains: Dict[Tuple[str, str, str, str], object] = {}
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = create_http_client()
+        return self._http_client
+
+    def get_chain(
+        self,
+        base_url: str = BASE_URL,
+        api_key: str = API_KEY,
+        model_name: str = MODEL_NAME,
+        kind: str = "post",
+        posts: int = 1,
+    ):
+        """Returns the "post" generation chain, or the "repair", "variants" or "translate" chain, for a backend.
+
+        Variants chains are built per requested post count, which sets their completion cap.
+        """
+        posts = posts if kind == "variants" else 1
+        key = (base_url, api_key, model_name, kind, posts)
+        chain = self._chains.get(key)
+        if chain is None:
+            llm = self._get_llm(base_url, api_key, model_name)
+            if kind == "variants":
+                chain = build_variants_chain(llm, posts)
+            else:
+                build = {
+                    "post": build_post_chain,
+                    "repair": build_repair_chain,
+                    "translate": build_translate_chain,
+                }[kind]
+                chain = build(llm)
+            self._chains[key] = chain
+        return chain
+
+    def _get_llm(self, base_url: str, api_key: str, model_name: str):
+        key = (base_url, api_key, model_name)
+        llm = self._llms.get(key)
+        if llm is None:
+            if not api_key:
+                raise ValueError("❌ Please set your API_KEY in the .env file")
+            from langchain_openai import ChatOpenAI
+
+            llm = self._llms[key] = ChatOpenAI(
+                base_url=base_url,
+                api_key=api_key,
+                model=model_name,
+                temperature=0.7,
+                max_tokens=LLM_MAX_TOKENS,
+                # Report token usage for streamed completions too (used for rate limiting)
+                stream_usage=True,
+                # Retries are handled by the agent's RetryPolicy, which also respects admission control
+                max_retries=0,
+                http_async_client=self.http_client,
+                # The OpenAI SDK sends its own per-request timeout, so it must match the pool's
+                timeout=http_timeout,
+            )
+        return llm
+
+    async def aclose(self):
+        """Closes the shared HTTP client; clients and chains are rebuilt on next use."""
+        self._llms.clear()
+        self._chains.clear()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+
+llm_registry = LLMClientRegistry()
 
 
 # --- LinkedIn Post Agent ---
 class LinkedInPostAgent:
-    def __init__(self):
-        # Use the LCEL chain
-        self.chain = post_chain
+    def __init__(
+        self,
+        cache=None,
+        chain=None,
+        repair_chain=None,
+        variants_chain=None,
+        translate_chain=None,
+        admission: Optional[AdmissionController] = None,
+        rate_limiter: Optional[ProviderRateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        router: Optional[BackendRouter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        # Optional fixed LCEL chains; by default the lazily built shared chains are used
+        self._chain = chain
+        self._repair_chain = repair_chain
+        self._variants_chain = variants_chain
+        self._translate_chain = translate_chain
+        # Optional response cache (see App/cache.py); None disables caching
+        self.cache = cache
+        # Optional gate bounding concurrent and queued LLM calls (see App/admission.py)
+        self.admission = admission
+        # Optional client-side RPM/TPM pacing (see App/rate_limit.py)
+        self.rate_limiter = rate_limiter
+        # Optional retry of transient upstream failures and hedging of slow calls (see App/retry.py)
+        self.retry_policy = retry_policy
+        self.hedge_policy = hedge_policy
+        # Optional balancing across several backends (see App/router.py); unused with a fixed chain
+        self.router = router
+        # Optional breaker that answers with the fallback post while the upstream is failing
+        self.breaker = breaker
+        # In-flight generations by cache key, so duplicate concurrent requests share one LLM call
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @property
+    def chain(self):
+        return self._get_chain("post")
+
+    def _get_chain(self, kind: str, backend=None, posts: int = 1):
+        fixed = {
+            "post": self._chain,
+            "repair": self._repair_chain,
+            "variants": self._variants_chain,
+            "translate": self._translate_chain,
+        }[kind]
+        if fixed is not None:
+            return fixed
+        if backend is None:
+            return llm_registry.get_chain(kind=kind, posts=posts)
+        return llm_registry.get_chain(backend.base_url, backend.api_key, backend.model_name, kind=kind, posts=posts)
+
+    def _llm_slot(self):
+        """Waits for a free LLM call slot; raises OverloadedError when saturated."""
+        return self.admission.slot() if self.admission is not None else nullcontext()
+
+    def _estimate_tokens(self, prompt_text: str, posts: int = 1) -> int:
+        """Rough token estimate for one call: ~4 characters per prompt token plus the completion cap."""
+        return len(prompt_text) // 4 + LLM_MAX_TOKENS * posts
+
+    @asynccontextmanager
+    async def _llm_call(self, prompt_text: str, kind: str = "post", posts: int = 1):
+        """Admits, paces and routes one upstream call; yields the chain and run config to use."""
+        queued = time.perf_counter()
+        async with self._llm_slot():
+            metrics.QUEUE_WAIT.observe(time.perf_counter() - queued)
+            estimated_tokens = self._estimate_tokens(prompt_text, posts)
+            if self.rate_limiter is not None:
+                with metrics.timed(metrics.RATE_LIMIT_WAIT):
+                    await self.rate_limiter.acquire(estimated_tokens)
+            usage = UsageCallbackHandler()
+            config = {"callbacks": [usage]}
+            if tracing_enabled():
+                config["callbacks"].append(TracingCallbackHandler())
+            try:
+                with metrics.timed(metrics.LLM_DURATION):
+                    if self._chain is not None or self.router is None:
+                        yield self._get_chain(kind, posts=posts), config
+                    else:
+                        async with self.router.route() as backend:
+                            yield self._get_chain(kind, backend, posts), config
+            except Exception as e:
+                if not isinstance(e, OverloadedError):
+                    metrics.UPSTREAM_ERRORS.labels(metrics.error_status(e)).inc()
+                raise
+            finally:
+                add_request_usage(usage)
+                if self.rate_limiter is not None:
+                    self.rate_limiter.record_usage(estimated_tokens, usage.total_tokens)
+
+    async def _cache_get(self, cache_key: str) -> Optional[dict]:
+        if self.cache is None:
+            return None
+        try:
+            if self.cache.blocking:
+                cached = await asyncio.to_thread(self.cache.get, cache_key)
+            else:
+                cached = self.cache.get(cache_key)
+        except Exception as e:
+            # A broken or locked cache must not fail the request: generate instead
+            print(f"⚠️ Cache lookup failed ({e!r}), treating it as a miss")
+            metrics.CACHE_LOOKUPS.labels("error").inc()
+            return None
+        metrics.CACHE_LOOKUPS.labels("hit" if cached is not None else "miss").inc()
+        return cached
+
+    async def _cache_set(self, cache_key: str, value: dict) -> None:
+        if self.cache is None:
+            return
+        try:
+            if self.cache.blocking:
+                await asyncio.to_thread(self.cache.set, cache_key, value)
+            else:
+                self.cache.set(cache_key, value)
+        except Exception as e:
+            print(f"⚠️ Cache write failed ({e!r}), the post is returned uncached")
 
     async def generate_post(self, topic: str, language: str = "English") -> LinkedInPost:
-        # LCEL chain returns the raw string directly when using ainvoke()
-        llm_output_string = await self.chain.ainvoke({"topic": topic, "language": language})
-        
-        # The dictionary extraction logic is now REMOVED because LCEL + StrOutputParser 
-        # ensures we get a string.
-        
-        return self._parse_output(llm_output_string, topic)
-
-
-    def _parse_output(self, text: str, topic: str) -> LinkedInPost:
-        """Parses the raw text output from the LLM into the structured LinkedInPost model."""
-        lines = text.strip().split("\n")
-        title, hashtags, call_to_action = "", [], ""
-        content_lines = []
-        parsing_content = False
-
-        for line in lines:
-            line = line.strip()
-            if line.upper().startswith("TITLE:"):
-                title = line.replace("TITLE:", "").strip()
-                parsing_content = False
-            elif line.upper().startswith("CONTENT:"):
-                parsing_content = True
-                part = line.replace("CONTENT:", "").strip()
-                if part:
-                    content_lines.append(part)
-            elif line.upper().startswith("HASHTAGS:"):
-                # Clean and split hashtags
-                tag_string = line.replace("HASHTAGS:", "").strip()
-                hashtags = [t.strip().replace("#", "") for t in tag_string.split(",") if t.strip()]
-                parsing_content = False
-            elif line.upper().startswith("CALL_TO_ACTION:"):
-                call_to_action = line.replace("CALL_TO_ACTION:", "").strip()
-                parsing_content = False
-            elif parsing_content and line:
-                # Accumulate content lines until the next section marker
-                content_lines.append(line)
-        
-        # Join content lines with double newlines for paragraph spacing
-        content = "\n\n".join(content_lines)
+        cache_key = make_cache_key(topic, language, MODEL_NAME, post_prompt_template)
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return LinkedInPost(**cached)
+        return (await self._single_flight(cache_key, lambda: self._generate_uncached(topic, language, cache_key)))[0]
+
+    async def generate_variants(self, topic: str, language: str = "English", variants: int = 2) -> List[LinkedInPost]:
+        """Generates up to `variants` different posts on the topic with a single model call."""
+        if variants <= 1:
+            return [await self.generate_post(topic, language)]
+        cache_key = make_cache_key(topic, language, MODEL_NAME, variants_prompt_template, variants=variants)
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return [LinkedInPost(**post) for post in cached["posts"]]
+        return await self._single_flight(
+            cache_key, lambda: self._generate_uncached(topic, language, cache_key, variants)
+        )
 
+    async def generate_translations(self, topic: str, languages: List[str]) -> Dict[str, LinkedInPost]:
+        """Generates the post once in the first (pivot) language and translates it into the others in parallel."""
+        pivot = await self._in_language(languages[0], self.generate_post(topic, languages[0]))
+        translations = await asyncio.gather(*(
+            self._in_language(language, self.translate_post(pivot, topic, languages[0], language))
+            for language in languages[1:]
+        ))
+        return dict(zip(languages, [pivot, *translations]))
+
+    async def _in_language(self, language: str, generation: Awaitable[LinkedInPost]) -> LinkedInPost:
+        """Runs one language of a fan-out in its own task, so its token usage is also accounted to that language."""
+
+        async def run():
+            track_language_usage(language)
+            return await generation
+
+        return await asyncio.ensure_future(run())
+
+    async def translate_post(self, post: LinkedInPost, topic: str, source_language: str, language: str) -> LinkedInPost:
+        # The source post is part of the key, so a regenerated pivot post is translated again
+        cache_key = make_cache_key(
+            topic, language, MODEL_NAME, translate_prompt_template,
+            source_language=source_language, source=post.model_dump(),
+        )
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return LinkedInPost(**cached)
+        posts = await self._single_flight(
+            cache_key, lambda: self._translate_uncached(post, topic, source_language, language, cache_key)
+        )
+        return posts[0]
+
+    async def _single_flight(self, cache_key: str, generate) -> List[LinkedInPost]:
+        # Single-flight: join the generation already running for the same request, if any
+        task = self._inflight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(generate())
+            self._inflight[cache_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        # shield() keeps a disconnecting client from cancelling the call for everyone else
+        return await asyncio.shield(task)
+
+    def _circuit_allows(self) -> bool:
+        if self.breaker is None or self.breaker.allow_request():
+            return True
+        print("⚠️ Upstream circuit is open, answering with the fallback post")
+        metrics.FALLBACK_POSTS.labels("circuit_open").inc()
+        return False
+
+    def _record_upstream_outcome(self, exc: Optional[BaseException]) -> None:
+        """Feeds the result of a generation into the circuit breaker."""
+        if self.breaker is None:
+            return
+        if exc is None:
+            self.breaker.record_success()
+        elif isinstance(exc, Exception) and is_retryable(exc):
+            self.breaker.record_failure()
+        else:
+            # Not an upstream failure (bad request, cancelled, rejected by admission control)
+            self.breaker.release()
+
+    async def _generate_uncached(self, topic: str, language: str, cache_key: str, variants: int = 1) -> List[LinkedInPost]:
+        if not self._circuit_allows():
+            return [self._create_fallback_post(topic, language)]
+
+        try:
+            # LCEL chain returns the raw string directly (the field dict in structured output mode)
+            llm_output = await self._complete_with_retries(topic, language, variants)
+        except BackendUnavailableError as e:
+            # Every backend's own circuit is open: no need to wait for the network either
+            self._record_upstream_outcome(e)
+            metrics.FALLBACK_POSTS.labels("backends_unavailable").inc()
+            return [self._create_fallback_post(topic, language)]
+        except BaseException as e:
+            self._record_upstream_outcome(e)
+            raise
+        self._record_upstream_outcome(None)
+
+        if variants > 1:
+            parsers = self._parse_variants(llm_output, variants)
+            incomplete = [p for p in parsers if not _is_complete(p)]
+            # One repair call per incomplete post, REPAIR_MAX_CALLS in total for the whole request
+            await asyncio.gather(
+                *(self._repair_missing(p, topic, language, max_calls=1) for p in incomplete[:REPAIR_MAX_CALLS])
+            )
+            posts = [self._build_post(p, topic) for p in parsers]
+            # Posts patched with default text are served once but not cached, so the next request tries again
+            if all(_is_complete(p) for p in parsers):
+                await self._cache_set(cache_key, {"posts": [post.model_dump() for post in posts]})
+            return posts
+
+        parser = self._parse_sections(llm_output)
+        await self._repair_missing(parser, topic, language)
+        post = self._build_post(parser, topic)
+        if _is_complete(parser):
+            await self._cache_set(cache_key, post.model_dump())
+        return [post]
+
+    def _retry_delay(self, attempt: int, exc: Exception, first_started: float) -> Optional[float]:
+        if self.retry_policy is None:
+            return None
+        return self.retry_policy.next_delay(attempt, exc, time.monotonic() - first_started)
+
+    async def _translate_uncached(
+        self, post: LinkedInPost, topic: str, source_language: str, language: str, cache_key: str
+    ) -> List[LinkedInPost]:
+        if not self._circuit_allows():
+            return [self._create_fallback_post(topic, language)]
+
+        inputs = {"source_language": source_language, "language": language, "post": _format_sections(post)}
+
+        async def translate():
+            async with self._llm_call(translate_prompt.format(**inputs), kind="translate") as (chain, config):
+                return await chain.ainvoke(inputs, config=config)
+
+        try:
+            llm_output = await self._with_retries(translate)
+        except BackendUnavailableError as e:
+            self._record_upstream_outcome(e)
+            metrics.FALLBACK_POSTS.labels("backends_unavailable").inc()
+            return [self._create_fallback_post(topic, language)]
+        except BaseException as e:
+            self._record_upstream_outcome(e)
+            raise
+        self._record_upstream_outcome(None)
+
+        parser = self._parse_sections(llm_output)
+        await self._repair_missing(parser, topic, language)
+        translated = self._build_post(parser, topic)
+        if _is_complete(parser):
+            await self._cache_set(cache_key, translated.model_dump())
+        return [translated]
+
+    async def _complete_with_retries(self, topic: str, language: str, variants: int = 1):
+        if self.hedge_policy is not None:
+            return await self._with_retries(lambda: self._complete_hedged(topic, language, variants))
+        return await self._with_retries(lambda: self._complete(topic, language, variants=variants))
+
+    async def _with_retries(self, call):
+        """Awaits call() again after each retryable failure, as allowed by the retry policy."""
+        attempt = 0
+        first_started = time.monotonic()
+        while True:
+            try:
+                return await call()
+            except Exception as e:
+                delay = self._retry_delay(attempt, e, first_started)
+                if delay is None:
+                    raise
+                attempt += 1
+                print(f"⚠️ LLM call failed ({e!r}), retry {attempt} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _complete(
+        self, topic: str, language: str, first_token: Optional[asyncio.Event] = None, variants: int = 1
+    ):
+        """Runs one upstream call and returns the raw output (text, or the field dict).
+
+        When first_token is given the output is streamed, so the event can be set (and the
+        time to first token recorded for hedging) as soon as the model starts answering.
+        With variants > 1 the multi-post prompt is used and the output is always text.
+        """
+        inputs = {"topic": topic, "language": language}
+        if variants > 1:
+            inputs["variants"] = variants
+            call = self._llm_call(variants_prompt.format(**inputs), kind="variants", posts=variants)
+        else:
+            call = self._llm_call(post_prompt.format(**inputs))
+        async with call as (chain, config):
+            if first_token is None:
+                return await chain.ainvoke(inputs, config=config)
+
+            started = time.monotonic()
+            chunks = []
+            async for chunk in chain.astream(inputs, config=config):
+                if not first_token.is_set():
+                    first_token.set()
+                    metrics.LLM_FIRST_TOKEN.observe(time.monotonic() - started)
+                    self.hedge_policy.record_first_token(time.monotonic() - started)
+                chunks.append(chunk)
+            if chunks and isinstance(chunks[-1], dict):
+                # Structured chunks are cumulative partial dicts; the last one is complete
+                return chunks[-1]
+            return "".join(chunks)
+
+    async def _complete_hedged(self, topic: str, language: str, variants: int = 1):
+        """Runs a call and, if it has no first token within the hedge threshold, races a second one."""
+        threshold = self.hedge_policy.threshold()
+        first_token = asyncio.Event()
+        primary = asyncio.ensure_future(self._complete(topic, language, first_token, variants))
+        if threshold is None:
+            # Not enough latency samples yet to know what "slow" is
+            return await primary
+
+        first_token_wait = asyncio.ensure_future(first_token.wait())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(
+                {primary, first_token_wait}, timeout=threshold, return_when=asyncio.FIRST_COMPLETED
+            )
+            if done:
+                # The primary call started answering (or finished) in time
+                return await primary
+
+            print(f"⚠️ No first token after {threshold:.1f}s, sending hedged request")
+            tasks.add(asyncio.ensure_future(self._complete(topic, language, asyncio.Event(), variants)))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            # Both calls failed; report the primary's error
+            return primary.result()
+        finally:
+            first_token_wait.cancel()
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def stream_post(self, topic: str, language: str = "English") -> AsyncIterator[Tuple[str, object]]:
+        """Streams a post generation as (event, data) pairs.
+
+        Emits "token" events with the raw text as it arrives (except in structured output
+        mode, where the model streams JSON), one event per completed
+        section ("title", "content", "hashtags", "call_to_action") and finally a "done"
+        event carrying the complete post (with defaults for any missing section). A canned
+        fallback post is announced by a "fallback" event before its sections.
+        """
+        cache_key = make_cache_key(topic, language, MODEL_NAME, post_prompt_template)
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            for event in self._post_events(LinkedInPost(**cached)):
+                yield event
+            return
+
+        if not self._circuit_allows():
+            for event in self._post_events(self._create_fallback_post(topic, language)):
+                yield event
+            return
+
+        try:
+            async for event in self._stream_uncached(topic, language, cache_key):
+                yield event
+        except BackendUnavailableError as e:
+            self._record_upstream_outcome(e)
+            metrics.FALLBACK_POSTS.labels("backends_unavailable").inc()
+            for event in self._post_events(self._create_fallback_post(topic, language)):
+                yield event
+        except BaseException as e:
+            self._record_upstream_outcome(e)
+            raise
+
+    def _post_events(self, post: LinkedInPost) -> List[Tuple[str, object]]:
+        """Stream events for a post that is already complete (cached or fallback)."""
+        events = [("fallback", True)] if post.is_fallback else []
+        events += [(field, getattr(post, field)) for field in ("title", "content", "hashtags", "call_to_action")]
+        events.append(("done", post.model_dump()))
+        return events
+
+    async def _stream_uncached(self, topic: str, language: str, cache_key: str) -> AsyncIterator[Tuple[str, object]]:
+        parser = StreamingPostParser() if OUTPUT_MODE == "labels" else StructuredPostParser()
+        inputs = {"topic": topic, "language": language}
+        attempt = 0
+        first_started = time.monotonic()
+        while True:
+            started = time.monotonic()
+            received_token = False
+            try:
+                async with self._llm_call(post_prompt.format(**inputs)) as (chain, config):
+                    async for chunk in chain.astream(inputs, config=config):
+                        if not chunk:
+                            continue
+                        if not received_token:
+                            received_token = True
+                            metrics.LLM_FIRST_TOKEN.observe(time.monotonic() - started)
+                            if self.hedge_policy is not None:
+                                self.hedge_policy.record_first_token(time.monotonic() - started)
+                        if isinstance(chunk, str):
+                            yield "token", chunk
+                        for event in parser.feed(chunk):
+                            yield event
+                break
+            except Exception as e:
+                # Tokens already sent to the client cannot be taken back, so only a call that
+                # failed before producing any output is retried
+                delay = None if received_token else self._retry_delay(attempt, e, first_started)
+                if delay is None:
+                    raise
+                attempt += 1
+                print(f"⚠️ LLM stream failed ({e!r}), retry {attempt} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+        for event in parser.close():
+            yield event
+
+        self._record_upstream_outcome(None)
+
+        for event in await self._repair_missing(parser, topic, language):
+            yield event
+
+        post = self._build_post(parser, topic)
+        if _is_complete(parser):
+            await self._cache_set(cache_key, post.model_dump())
+        yield "done", post.model_dump()
+
+    def _parse_output(self, output, topic: str) -> LinkedInPost:
+        """Parses the raw LLM output (text, or the field dict in structured output mode) into the LinkedInPost model."""
+        return self._build_post(self._parse_sections(output), topic)
+
+    def _parse_variants(self, text: str, variants: int) -> List[StreamingPostParser]:
+        """Splits a multi-post completion into parsers for at most `variants` posts (at least one, maybe empty)."""
+        with metrics.timed(metrics.PARSE_DURATION):
+            parsers = [StreamingPostParser.parse(part) for part in split_posts(text)]
+        parsers = [p for p in parsers if any(getattr(p, field) for field in _SECTION_LABELS)]
+        return parsers[:variants] or [StreamingPostParser.parse("")]
+
+    def _parse_sections(self, output):
+        """Parses the raw LLM output into a finished parser holding the sections found."""
+        with metrics.timed(metrics.PARSE_DURATION):
+            if isinstance(output, dict):
+                return StructuredPostParser.parse(output)
+            return StreamingPostParser.parse(output)
+
+    async def _repair_missing(
+        self, parser, topic: str, language: str, max_calls: int = REPAIR_MAX_CALLS
+    ) -> List[Tuple[str, object]]:
+        """Asks the model for just the sections the parser did not find, within max_calls calls.
+
+        Repaired sections are set on the parser and returned as stream events. A failed
+        repair call is not an error: the remaining sections get default values instead.
+        """
+        events = []
+        for _ in range(max_calls):
+            missing = [field for field in _SECTION_LABELS if not getattr(parser, field)]
+            if not missing:
+                break
+            inputs = {
+                "topic": topic,
+                "language": language,
+                "post": _format_sections(parser),
+                "sections": "\n".join(_SECTION_LABELS[field] for field in missing),
+            }
+            try:
+                async with self._llm_call(repair_prompt.format(**inputs), kind="repair") as (chain, config):
+                    output = await chain.ainvoke(inputs, config=config)
+            except Exception as e:
+                print(f"⚠️ Repair call for {', '.join(missing)} failed ({e!r}), using defaults")
+                metrics.PARSE_REPAIRS.labels("error").inc()
+                break
+            repaired = StreamingPostParser.parse(output)
+            for field in missing:
+                value = getattr(repaired, field)
+                if value:
+                    setattr(parser, field, value)
+                    events.append((field, value))
+            metrics.PARSE_REPAIRS.labels("complete" if all(getattr(parser, f) for f in missing) else "partial").inc()
+        return events
+
+    def _build_post(self, parser, topic: str) -> LinkedInPost:
+        """Builds the post from a finished parser."""
+        for field in ("title", "content", "hashtags", "call_to_action"):
+            if not getattr(parser, field):
+                metrics.PARSE_DEFAULTS.labels(field).inc()
         # Return structured post, providing sensible defaults if parsing failed
         return LinkedInPost(
-            title=title or f"Insights on {topic}",
-            content=content or f"Sharing thoughts on {topic}.",
-            hashtags=hashtags or ["business", "growth", "leadership"],
-            call_to_action=call_to_action or "What do you think? Let’s discuss!"
+            title=parser.title or f"Insights on {topic}",
+            content=parser.content or f"Sharing thoughts on {topic}.",
+            hashtags=parser.hashtags or ["business", "growth", "leadership"],
+            call_to_action=parser.call_to_action or "What do you think? Let’s discuss!"
+        )
+
+    def _create_fallback_post(self, topic: str, language: str) -> LinkedInPost:
+        """Creates a generic post, used without calling the model while the upstream is down."""
+        post = LinkedInPost(
+            title=f"Insights on {topic}",
+            content=f"{topic} keeps reshaping how we work, bringing both challenges and opportunities "
+                    f"that deserve our attention and strategic thinking.\n\n"
+                    f"I'd love to hear your perspectives and experiences in this area.",
+            hashtags=["business", "growth", "leadership"],
+            call_to_action="What do you think? Let’s discuss!"
         )
+        post._fallback = True
+        return post
 
 
 # --- API Routes ---
-agent = LinkedInPostAgent()
+agent = LinkedInPostAgent(
+    cache=create_cache(CACHE_BACKEND, CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, CACHE_PATH),
+    admission=AdmissionController(MAX_IN_FLIGHT_LLM_CALLS, MAX_QUEUED_LLM_CALLS, QUEUE_TIMEOUT_SECONDS),
+    rate_limiter=(
+        ProviderRateLimiter(RATE_LIMIT_RPM, RATE_LIMIT_TPM, RATE_LIMIT_BURST_SECONDS)
+        if RATE_LIMIT_RPM > 0 or RATE_LIMIT_TPM > 0 else None
+    ),
+    retry_policy=RetryPolicy(
+        LLM_MAX_RETRIES, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+        budget=LLM_RETRY_BUDGET_SECONDS, attempt_timeout=HTTP_READ_TIMEOUT,
+    ),
+    hedge_policy=(
+        HedgePolicy(HEDGE_PERCENTILE, min_samples=HEDGE_MIN_SAMPLES, min_delay=HEDGE_MIN_DELAY)
+        if HEDGING_ENABLED else None
+    ),
+    router=BackendRouter(
+        parse_backends(
+            LLM_BACKENDS, BASE_URL, API_KEY, MODEL_NAME,
+            BACKEND_FAILURE_THRESHOLD, BACKEND_RESET_TIMEOUT,
+        ),
+        ewma_alpha=BACKEND_EWMA_ALPHA,
+    ),
+    breaker=CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT),
+)
+
+# Opened in lifespan (None while USAGE_DB_PATH is empty or the app is not started)
+usage_store: Optional[UsageStore] = None
+
+
+async def _run_job(payload: dict) -> dict:
+    """Generates the post for a queued job; usage is accounted to the client that submitted it."""
+    usage = track_request_usage()
+    language = payload["language"]
+    if isinstance(language, list):
+        by_language = await agent.generate_translations(payload["topic"], language)
+        posts = list(by_language.values())
+    else:
+        posts = await agent.generate_variants(payload["topic"], language, payload.get("variants", 1))
+    await _store_usage(payload["client_id"], language, usage)
+    result = {
+        "post": posts[0].model_dump(),
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+    }
+    if isinstance(language, list):
+        result["posts_by_language"] = {lang: post.model_dump() for lang, post in by_language.items()}
+    elif payload.get("variants", 1) > 1:
+        result["posts"] = [post.model_dump() for post in posts]
+    if any(post.is_fallback for post in posts):
+        result["fallback"] = True
+    return result
+
+
+# Job queue and its workers, created in lifespan (None while disabled or not started)
+job_store = None
+job_pool: Optional[JobWorkerPool] = None
 
 class PostRequest(BaseModel):
     topic: str
-    language: str = "English"
+    # A list of languages returns a map of language to post, generated once in the first
+    # language and translated into the others
+    language: Union[str, List[str]] = "English"
+    # More than one returns a list of different posts for A/B testing, generated in one model call
+    variants: int = Field(1, ge=1, le=MAX_VARIANTS)
+
+    @field_validator("language")
+    @classmethod
+    def _dedupe_languages(cls, value):
+        if isinstance(value, str):
+            return value
+        languages, seen = [], set()
+        for language in value:
+            language = language.strip()
+            if language and language.lower() not in seen:
+                seen.add(language.lower())
+                languages.append(language)
+        if not languages:
+            raise ValueError("at least one language is required")
+        if len(languages) > MAX_LANGUAGES:
+            raise ValueError(f"at most {MAX_LANGUAGES} languages are allowed")
+        return languages
+
+    @model_validator(mode="after")
+    def _single_mode(self):
+        if self.variants > 1 and isinstance(self.language, list):
+            raise ValueError("variants cannot be combined with several languages")
+        return self
+
+class BatchItemResult(BaseModel):
+    """Result of one item of a batch: either the generated post or the error message."""
+    topic: str
+    language: Union[str, List[str]]
+    post: Optional[LinkedInPost] = None
+    # Every variant (the first one is also in post) when the item asked for variants > 1
+    posts: Optional[List[LinkedInPost]] = None
+    # Post per language (the first one is also in post) when the item asked for several languages
+    posts_by_language: Optional[Dict[str, LinkedInPost]] = None
+    error: Optional[str] = None
+    # True when a post is the canned fallback served while the upstream is down
+    fallback: bool = False
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+def _overloaded_response(e: OverloadedError) -> HTTPException:
+    """Maps a rejected admission to 429/503 with a Retry-After header."""
+    return HTTPException(
+        status_code=e.status_code,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def _json_response(route: str, content, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Serializes the response body, recording how long serialization takes."""
+    with metrics.timed(metrics.SERIALIZATION_DURATION.labels(route)):
+        if isinstance(content, BaseModel):
+            return Response(content=content.model_dump_json(), media_type="application/json", headers=headers)
+        return JSONResponse(content, headers=headers)
+
+
+def _client_id(http_request: Request) -> str:
+    """Identifies the calling client for usage accounting: X-Client-ID, else the client address."""
+    return (
+        http_request.headers.get("x-client-id")
+        or http_request.headers.get("x-real-ip")
+        or (http_request.client.host if http_request.client else "unknown")
+    )
+
+
+async def _store_usage(client_id: str, language: Union[str, List[str]], usage: RequestUsage) -> None:
+    if usage_store is None:
+        return
+    # A fan-out to several languages is recorded as one row per language (pivot and translations)
+    rows = list(usage.by_language.items()) if isinstance(language, list) else [(language, usage)]
+    for row_language, row_usage in rows:
+        if not row_usage.total_tokens:
+            continue
+        try:
+            await asyncio.to_thread(usage_store.record, client_id, row_language, MODEL_NAME, row_usage)
+        except Exception:
+            # Accounting must never fail the generation itself
+            print(traceback.format_exc())
+
+
+def _usage_headers(prompt_tokens: int, completion_tokens: int) -> Dict[str, str]:
+    return {
+        "X-Usage-Prompt-Tokens": str(prompt_tokens),
+        "X-Usage-Completion-Tokens": str(completion_tokens),
+    }
+
+
+async def _record_usage(
+    http_request: Request, language: Union[str, List[str]], usage: RequestUsage
+) -> Dict[str, str]:
+    """Stores the request's token usage and returns it as response headers."""
+    await _store_usage(_client_id(http_request), language, usage)
+    return _usage_headers(usage.prompt_tokens, usage.completion_tokens)
+
+
+def _fallback_headers(posts: List[LinkedInPost]) -> Dict[str, str]:
+    """Marks responses holding a canned fallback post instead of a generated one."""
+    return {"X-Fallback-Post": "true"} if any(post.is_fallback for post in posts) else {}
+
 
 @app.get("/")
 async def root():
@@ -171,24 +1206,250 @@ async def root():
     return {"message": "Welcome to the LinkedIn Post Generator API! Status: OK"}
 
 
-@app.post("/generate", response_model=LinkedInPost)
-async def generate_post_structured(request: PostRequest):
-    """Generates a LinkedIn post and returns the structured data model."""
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics (per-stage latency histograms, cache, fallback and error counters)."""
+    rendered = metrics.render_metrics()
+    if rendered is None:
+        raise HTTPException(status_code=501, detail="Metrics unavailable: install prometheus-client")
+    body, content_type = rendered
+    return Response(content=body, media_type=content_type)
+
+
+@app.post("/generate", response_model=Union[LinkedInPost, List[LinkedInPost], Dict[str, LinkedInPost]])
+async def generate_post_structured(request: PostRequest, http_request: Request):
+    """Generates a LinkedIn post and returns the structured data model.
+
+    Returns a list of posts for variants > 1, and a map of language to post when
+    language is a list.
+    """
     try:
-        post = await agent.generate_post(request.topic, request.language)
-        return post
+        usage = track_request_usage()
+        if isinstance(request.language, list):
+            by_language = await agent.generate_translations(request.topic, request.language)
+            posts = list(by_language.values())
+            content = {language: post.model_dump() for language, post in by_language.items()}
+        elif request.variants > 1:
+            posts = await agent.generate_variants(request.topic, request.language, request.variants)
+            content = [post.model_dump() for post in posts]
+        else:
+            content = await agent.generate_post(request.topic, request.language)
+            posts = [content]
+        headers = await _record_usage(http_request, request.language, usage)
+        headers.update(_fallback_headers(posts))
+        return _json_response("/generate", content, headers)
+    except OverloadedError as e:
+        raise _overloaded_response(e)
     except Exception as e:
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
 
 @app.post("/generate_formatted")
-async def generate_formatted(request: PostRequest):
+async def generate_formatted(request: PostRequest, http_request: Request):
     """Generates a LinkedIn post and returns the final formatted string for easy copying."""
     try:
-        post = await agent.generate_post(request.topic, request.language)
-        return {"formatted_post": post.format_post()}
+        usage = track_request_usage()
+        if isinstance(request.language, list):
+            by_language = await agent.generate_translations(request.topic, request.language)
+            posts = list(by_language.values())
+        else:
+            posts = await agent.generate_variants(request.topic, request.language, request.variants)
+        headers = await _record_usage(http_request, request.language, usage)
+        headers.update(_fallback_headers(posts))
+        with metrics.timed(metrics.FORMAT_DURATION):
+            formatted_posts = [post.format_post() for post in posts]
+        # "formatted_posts" lists every variant when more than one was asked for, and
+        # "formatted_by_language" maps each language to its post for several languages
+        content = {"formatted_post": formatted_posts[0]}
+        if isinstance(request.language, list):
+            content["formatted_by_language"] = dict(zip(by_language, formatted_posts))
+        elif request.variants > 1:
+            content["formatted_posts"] = formatted_posts
+        return _json_response("/generate_formatted", content, headers)
+    except OverloadedError as e:
+        raise _overloaded_response(e)
     except Exception as e:
         print(traceback.format_exc())
         # Return a simple error dictionary for the frontend to handle
         return {"error": f"Failed to generate post: {str(e)}"}
+
+
+@app.post("/generate_batch", response_model=List[BatchItemResult])
+async def generate_batch(requests: List[PostRequest], http_request: Request):
+    """Generates posts for many topics concurrently and returns the results in input order.
+
+    At most BATCH_CONCURRENCY generations run at the same time. A failing item does not
+    fail the whole batch; its error is reported in the corresponding result instead.
+    Batches of more than MAX_BATCH_SIZE items are rejected with 413.
+    """
+    if len(requests) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413, detail=f"Batch of {len(requests)} items exceeds the limit of {MAX_BATCH_SIZE}"
+        )
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run_one(request: PostRequest) -> BatchItemResult:
+        async with semaphore:
+            try:
+                # Each item runs in its own task, so its usage is accounted separately
+                usage = track_request_usage()
+                by_language = None
+                if isinstance(request.language, list):
+                    by_language = await agent.generate_translations(request.topic, request.language)
+                    posts = list(by_language.values())
+                else:
+                    posts = await agent.generate_variants(request.topic, request.language, request.variants)
+                await _record_usage(http_request, request.language, usage)
+                return BatchItemResult(
+                    topic=request.topic,
+                    language=request.language,
+                    post=posts[0],
+                    posts=posts if request.variants > 1 else None,
+                    posts_by_language=by_language,
+                    fallback=any(post.is_fallback for post in posts),
+                    prompt_tokens=usage.prompt_tokens,
+                    completion_tokens=usage.completion_tokens,
+                )
+            except Exception as e:
+                print(traceback.format_exc())
+                return BatchItemResult(topic=request.topic, language=request.language, error=str(e))
+
+    # gather() preserves the order of its arguments, so results line up with the input list
+    return await asyncio.gather(*(run_one(request) for request in requests))
+
+
+def _format_sse(event: str, data) -> str:
+    """Encodes one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/generate_stream")
+async def generate_stream(request: PostRequest, http_request: Request):
+    """Streams the generated post as Server-Sent Events.
+
+    Events: "token" (raw text chunk), "title", "content", "hashtags" and "call_to_action"
+    (each sent once the section is complete), "usage" with the token counts, then "done"
+    with the full structured post, or "error" if generation fails midway. A canned fallback
+    post starts with a "fallback" event and carries the X-Fallback-Post: true header.
+    """
+    if request.variants > 1 or isinstance(request.language, list):
+        raise HTTPException(
+            status_code=400, detail="variants > 1 or several languages are not supported when streaming; use /generate"
+        )
+    usage = track_request_usage()
+    events = agent.stream_post(request.topic, request.language)
+    # Wait for the first event before sending headers, so a request rejected by admission
+    # control still gets a proper 429/503 status instead of an error event.
+    try:
+        first_event = await events.__anext__()
+    except OverloadedError as e:
+        raise _overloaded_response(e)
+    except StopAsyncIteration:
+        first_event = None
+    except Exception as e:
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+    # Disable proxy buffering (nginx) so events reach the browser immediately
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if first_event is not None and first_event[0] == "fallback":
+        headers["X-Fallback-Post"] = "true"
+
+    async def event_stream():
+        try:
+            if first_event is None:
+                return
+            event, data = first_event
+            while True:
+                if event == "token":
+                    data = {"text": data}
+                elif event == "done":
+                    await _record_usage(http_request, request.language, usage)
+                    yield _format_sse("usage", {
+                        "prompt_tokens": usage.prompt_tokens,
+                        "completion_tokens": usage.completion_tokens,
+                    })
+                yield _format_sse(event, data)
+                try:
+                    event, data = await events.__anext__()
+                except StopAsyncIteration:
+                    break
+        except Exception as e:
+            print(traceback.format_exc())
+            yield _format_sse("error", {"error": f"Failed to generate post: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=headers,
+    )
+
+
+@app.get("/usage")
+async def get_usage(client_id: Optional[str] = None, start_day: Optional[str] = None, end_day: Optional[str] = None):
+    """Token usage aggregated per day, client, language and model (days as YYYY-MM-DD, inclusive)."""
+    if usage_store is None:
+        raise HTTPException(status_code=501, detail="Usage accounting is disabled (USAGE_DB_PATH is empty)")
+    return await asyncio.to_thread(usage_store.query, client_id, start_day, end_day)
+
+
+def _job_status(job: dict) -> dict:
+    status = {key: value for key, value in job.items() if key != "result"}
+    status["result_url"] = f"/jobs/{job['job_id']}/result"
+    return status
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(request: PostRequest, http_request: Request):
+    """Queues a post generation and returns its job id at once; poll GET /jobs/{id} for progress."""
+    if job_store is None:
+        raise HTTPException(status_code=501, detail="Job queue is disabled (JOB_BACKEND=none)")
+    if await job_store.queued_count() >= JOB_MAX_QUEUED:
+        raise HTTPException(
+            status_code=429, detail="Too many queued jobs, please retry later", headers={"Retry-After": "30"}
+        )
+    job_id = new_job_id()
+    await job_store.enqueue(job_id, {
+        "topic": request.topic,
+        "language": request.language,
+        "variants": request.variants,
+        "client_id": _client_id(http_request),
+    })
+    job_pool.notify()
+    return JSONResponse(
+        {"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}", "result_url": f"/jobs/{job_id}/result"},
+        status_code=202,
+        headers={"Location": f"/jobs/{job_id}"},
+    )
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of a job: queued, running, succeeded or failed (with the error)."""
+    if job_store is None:
+        raise HTTPException(status_code=501, detail="Job queue is disabled (JOB_BACKEND=none)")
+    job = await job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_status(job)
+
+
+@app.get("/jobs/{job_id}/result", response_model=Union[LinkedInPost, List[LinkedInPost], Dict[str, LinkedInPost]])
+async def get_job_result(job_id: str):
+    """The generated post (variants, or post per language) of a finished job; 202 with Retry-After while pending."""
+    if job_store is None:
+        raise HTTPException(status_code=501, detail="Job queue is disabled (JOB_BACKEND=none)")
+    job = await job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=f"Failed to generate post: {job['error']}")
+    if job["status"] != "succeeded":
+        return JSONResponse(_job_status(job), status_code=202, headers={"Retry-After": "2"})
+    result = job["result"]
+    headers = _usage_headers(result["prompt_tokens"], result["completion_tokens"])
+    if result.get("fallback"):
+        headers["X-Fallback-Post"] = "true"
+    content = result.get("posts_by_language") or result.get("posts") or result["post"]
+    return _json_response("/jobs/{job_id}/result", content, headers)
@@ -0,0 +1,113 @@
+"""
+Prometheus metrics for the LinkedIn Post Generator API, exposed at /metrics.
+
+Uses the optional prometheus_client package (pip install prometheus-client); without it
+the metrics below are no-ops and /metrics reports that metrics are unavailable. When
+running several workers, PROMETHEUS_MULTIPROC_DIR names the directory through which every
+worker's samples are aggregated; App/serve.py sets it up (the Docker image sets its path).
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+    from prometheus_client import multiprocess
+except ImportError:  # prometheus_client is optional
+    Counter = Histogram = None
+
+# Latency buckets (seconds) covering both in-process work (sub-millisecond) and LLM calls
+_FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+_SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60, 120)
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+
+def _histogram(name, documentation, buckets, labelnames=()):
+    if Histogram is None:
+        return _NoopMetric()
+    return Histogram(name, documentation, labelnames, buckets=buckets)
+
+
+def _counter(name, documentation, labelnames=()):
+    if Counter is None:
+        return _NoopMetric()
+    return Counter(name, documentation, labelnames)
+
+
+QUEUE_WAIT = _histogram(
+    "linkedin_queue_wait_seconds", "Time spent waiting for an LLM call slot (admission control)", _SLOW_BUCKETS
+)
+RATE_LIMIT_WAIT = _histogram(
+    "linkedin_rate_limit_wait_seconds", "Time spent paced by the client-side RPM/TPM limiter", _SLOW_BUCKETS
+)
+# Only streamed calls have a first token: /generate_stream and generations with hedging
+# enabled. Plain /generate calls return the completion at once; see LLM_DURATION for them
+LLM_FIRST_TOKEN = _histogram(
+    "linkedin_llm_time_to_first_token_seconds",
+    "Time from request to first token, for streamed calls only (/generate_stream, hedged generations)",
+    _SLOW_BUCKETS,
+)
+LLM_DURATION = _histogram(
+    "linkedin_llm_duration_seconds", "Total duration of one upstream LLM call", _SLOW_BUCKETS
+)
+PARSE_DURATION = _histogram(
+    "linkedin_parse_seconds", "Time to parse the LLM output into a LinkedInPost", _FAST_BUCKETS
+)
+FORMAT_DURATION = _histogram(
+    "linkedin_format_post_seconds", "Time spent in LinkedInPost.format_post", _FAST_BUCKETS
+)
+SERIALIZATION_DURATION = _histogram(
+    "linkedin_response_serialization_seconds", "Time to serialize the JSON response", _FAST_BUCKETS, ("route",)
+)
+
+FALLBACK_POSTS = _counter(
+    "linkedin_fallback_posts_total", "Posts answered with the fallback post instead of the model", ("reason",)
+)
+PARSE_DEFAULTS = _counter(
+    "linkedin_parse_defaults_total", "Post fields filled with a default because parsing found nothing", ("field",)
+)
+PARSE_REPAIRS = _counter(
+    "linkedin_parse_repairs_total", "Repair calls for missing post sections by outcome", ("outcome",)
+)
+CACHE_LOOKUPS = _counter("linkedin_cache_lookups_total", "Response cache lookups (hit, miss or error)", ("result",))
+UPSTREAM_ERRORS = _counter(
+    "linkedin_upstream_errors_total", "Failed upstream LLM calls by HTTP status (or error type)", ("status",)
+)
+
+
+@contextmanager
+def timed(histogram):
+    """Observes the duration of the with-block on the given histogram."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started)
+
+
+def error_status(exc: BaseException) -> str:
+    """Label for an upstream error: the HTTP status if there is one, else the exception type."""
+    status_code = getattr(exc, "status_code", None)
+    return str(status_code) if status_code is not None else type(exc).__name__
+
+
+def render_metrics():
+    """Returns (body, content type) for the /metrics endpoint, or None without prometheus_client."""
+    if Histogram is None:
+        return None
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
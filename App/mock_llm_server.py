@@ -0,0 +1,227 @@
+"""
+Fake OpenAI-compatible chat completions server for load testing without burning tokens.
+
+Answers POST /chat/completions (plain and streamed) with a realistic labelled LinkedIn post
+(or, when the request asks for structured output via response_format or tools, the same
+post as JSON content or a tool call) after a simulated time to first token drawn from a
+log-normal distribution, emits the
+completion at a fixed token rate and fails a configurable share of requests with 429/500.
+
+Usage (from the project root):
+    python -m App.mock_llm_server --port 9000 --latency-median 0.8 --token-rate 60 --error-rate 0.02
+
+Then point the API at it with BASE_URL=http://127.0.0.1:9000 (any API_KEY works).
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from .post_parser import StreamingPostParser
+
+PARAGRAPHS = [
+    "{topic} is no longer a future trend; it is reshaping how teams plan, build and deliver every single day.",
+    "The organisations getting the most out of it start small, measure relentlessly and share what they learn across functions.",
+    "The biggest wins rarely come from the technology alone. They come from people who are given the time and trust to experiment.",
+]
+
+
+class MockSettings:
+    def __init__(self, latency_median: float, latency_sigma: float, token_rate: float, error_rate: float, seed=None):
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.token_rate = token_rate
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+    def time_to_first_token(self) -> float:
+        if self.latency_median <= 0:
+            return 0.0
+        return self.random.lognormvariate(0, self.latency_sigma) * self.latency_median
+
+
+def _post_fields(messages) -> dict:
+    prompt = " ".join(str(message.get("content", "")) for message in messages)
+    match = re.search(r"Topic:\s*(.+)", prompt)
+    topic = match.group(1).strip() if match else "Innovation"
+    return {
+        "title": f"What {topic} Means for Your Team in 2025",
+        "content": "\n\n".join(p.format(topic=topic) for p in PARAGRAPHS),
+        "hashtags": ["innovation", "leadership", "futureofwork", re.sub(r"\W+", "", topic.title()) or "Business"],
+        "call_to_action": f"How is {topic} changing the way your team works? Share your experience in the comments!",
+    }
+
+
+def _translated_fields(messages):
+    """For a translation prompt, the source post with its title marked with the target language."""
+    prompt = " ".join(str(message.get("content", "")) for message in messages)
+    match = re.search(r"Translate the LinkedIn post below from .+? into ([^.]+)\.", prompt)
+    if not match:
+        return None
+    # The labelled source post sits between the instructions and the output format
+    source = StreamingPostParser.parse(prompt[match.end():].split("Format the output")[0])
+    return {
+        "title": f"[{match.group(1)}] {source.title}",
+        "content": source.content,
+        "hashtags": source.hashtags,
+        "call_to_action": source.call_to_action,
+    }
+
+
+def _requested_variants(messages) -> int:
+    prompt = " ".join(str(message.get("content", "")) for message in messages)
+    match = re.search(r"Create (\d+) different LinkedIn posts", prompt)
+    return int(match.group(1)) if match else 1
+
+
+def _labelled_text(fields: dict) -> str:
+    return (
+        f"TITLE: {fields['title']}\n"
+        f"CONTENT: {fields['content']}\n"
+        f"HASHTAGS: {', '.join(fields['hashtags'])}\n"
+        f"CALL_TO_ACTION: {fields['call_to_action']}"
+    )
+
+
+def _tokens(text: str):
+    """Splits text into pseudo-tokens (words with their trailing whitespace)."""
+    return re.findall(r"\S+\s*", text)
+
+
+def create_app(settings: MockSettings) -> FastAPI:
+    app = FastAPI(title="Mock LLM server")
+
+    @app.post("/chat/completions")
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "mock-model")
+        messages = body.get("messages", [])
+
+        roll = settings.random.random()
+        if roll < settings.error_rate:
+            status_code = 429 if roll < settings.error_rate / 2 else 500
+            return JSONResponse(
+                {"error": {"message": "Simulated upstream error", "type": "mock_error", "code": status_code}},
+                status_code=status_code,
+            )
+
+        fields = _translated_fields(messages) or _post_fields(messages)
+        tools = body.get("tools") or []
+        # Structured output: JSON content for response_format, JSON arguments for a tool call
+        structured = bool(tools) or (body.get("response_format") or {}).get("type") in ("json_schema", "json_object")
+        variants = _requested_variants(messages)
+        if structured:
+            text = json.dumps(fields)
+        elif variants > 1:
+            text = "\n".join(
+                f"POST {i}:\n" + _labelled_text({**fields, "title": f"{fields['title']} (take {i})"})
+                for i in range(1, variants + 1)
+            )
+        else:
+            text = _labelled_text(fields)
+        tokens = _tokens(text)
+        tool_name = tools[0]["function"]["name"] if tools else None
+        tool_call_id = f"call_{uuid.uuid4().hex[:12]}"
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        per_token = 1 / settings.token_rate if settings.token_rate > 0 else 0
+
+        await asyncio.sleep(settings.time_to_first_token())
+
+        if not body.get("stream"):
+            await asyncio.sleep(per_token * len(tokens))
+            message = {"role": "assistant", "content": text}
+            if tool_name:
+                message = {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [{
+                        "id": tool_call_id,
+                        "type": "function",
+                        "function": {"name": tool_name, "arguments": text},
+                    }],
+                }
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": "tool_calls" if tool_name else "stop",
+                }],
+                "usage": usage,
+            }
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        def chunk(delta, finish_reason=None, chunk_usage=None):
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [] if chunk_usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if chunk_usage:
+                payload["usage"] = chunk_usage
+            return f"data: {json.dumps(payload)}\n\n"
+
+        def tool_delta(arguments, first=False):
+            call = {"index": 0, "function": {"arguments": arguments}}
+            if first:
+                call.update(id=tool_call_id, type="function")
+                call["function"]["name"] = tool_name
+            return {"tool_calls": [call]}
+
+        async def events():
+            yield chunk({"role": "assistant", "content": ""})
+            if tool_name:
+                yield chunk(tool_delta("", first=True))
+            for token in tokens:
+                yield chunk(tool_delta(token) if tool_name else {"content": token})
+                if per_token:
+                    await asyncio.sleep(per_token)
+            yield chunk({}, finish_reason="tool_calls" if tool_name else "stop")
+            if include_usage:
+                yield chunk(None, chunk_usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-median", type=float, default=0.8, help="median time to first token (s)")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="log-normal sigma of time to first token")
+    parser.add_argument("--token-rate", type=float, default=60, help="completion tokens per second (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failing with 429/500")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    settings = MockSettings(args.latency_median, args.latency_sigma, args.token_rate, args.error_rate, args.seed)
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Push-style parser for the labelled LLM output format:
+
+    TITLE: <headline>
+    CONTENT: <2-4 paragraphs, may span several lines>
+    HASHTAGS: <comma-separated tags>
+    CALL_TO_ACTION: <call to action>
+
+Shared by the FastAPI app (App/main.py) and the CLI agent (App/Lnkedin_post_agent.py).
+StructuredPostParser handles the JSON fields returned in structured output mode instead,
+and split_posts() cuts a multi-post completion ("POST 1:", "POST 2:", ...) into posts.
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+_LABELS = (
+    ("TITLE:", "title"),
+    ("CONTENT:", "content"),
+    ("HASHTAGS:", "hashtags"),
+    ("CALL_TO_ACTION:", "call_to_action"),
+)
+# Longest label length, used to upper-case only the start of each line when matching labels
+_LABEL_PREFIX_LEN = max(len(label) for label, _ in _LABELS)
+# "POST 1:", "Post 2.", "**POST 3**" or "POST 4" alone at the start of a line (but not "Post 5 years ago")
+_POST_MARKER = re.compile(r"^[ \t*#]*POST[ \t]*#?[ \t]*\d+[ \t]*\**[ \t]*(?:[:.)\-]|$)[ \t*]*", re.IGNORECASE | re.MULTILINE)
+
+
+def _has_label(text: str) -> bool:
+    return any(
+        line.strip()[:_LABEL_PREFIX_LEN].upper().startswith(label)
+        for line in text.splitlines()
+        for label, _ in _LABELS
+    )
+
+
+def split_posts(text: str) -> List[str]:
+    """Splits a multi-post completion at its "POST n:" markers; text without markers is one post.
+
+    Text before the first marker is kept as a post when it holds any label (the model
+    left out the "POST 1:" header) and dropped otherwise (such as "Here are your posts:").
+
+    >>> titles = lambda text: [StreamingPostParser.parse(post).title for post in split_posts(text)]
+    >>> titles("Here are your posts:\\nPOST 1:\\nTITLE: one\\nPOST 2:\\nTITLE: two")
+    ['one', 'two']
+    >>> titles("TITLE: one\\nPOST 2:\\nTITLE: two")
+    ['one', 'two']
+    """
+    markers = list(_POST_MARKER.finditer(text))
+    if not markers:
+        return [text]
+    ends = [marker.start() for marker in markers[1:]] + [len(text)]
+    posts = [text[marker.end():end] for marker, end in zip(markers, ends)]
+    preamble = text[:markers[0].start()]
+    if _has_label(preamble):
+        posts.insert(0, preamble)
+    return posts
+
+
+class StreamingPostParser:
+    """State-machine parser that accepts arbitrary text chunks.
+
+    feed() returns the sections completed so far as (field, value) events. Single-line
+    sections (title, hashtags, call to action) are complete at the end of their line;
+    the multi-line content section is complete when the next label starts or when
+    close() is called at the end of the stream. Labels are matched case-insensitively
+    and CRLF line endings are accepted.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._in_content = False
+        self.title = ""
+        self.content_lines: List[str] = []
+        self.hashtags: List[str] = []
+        self.call_to_action = ""
+
+    @classmethod
+    def parse(cls, text: str) -> "StreamingPostParser":
+        """Parses a complete output in one pass and returns the finished parser."""
+        parser = cls()
+        parser.feed(text)
+        parser.close()
+        return parser
+
+    def feed(self, chunk: str) -> List[Tuple[str, object]]:
+        self._buffer += chunk
+        events = []
+        start = 0
+        # Only complete lines are processed; the trailing partial line stays buffered
+        while True:
+            end = self._buffer.find("\n", start)
+            if end == -1:
+                break
+            events.extend(self._process_line(self._buffer[start:end]))
+            start = end + 1
+        self._buffer = self._buffer[start:]
+        return events
+
+    def close(self) -> List[Tuple[str, object]]:
+        """Flushes the last (unterminated) line and completes the open content section."""
+        events = self._process_line(self._buffer)
+        self._buffer = ""
+        events.extend(self._finish_content())
+        return events
+
+    @property
+    def content(self) -> str:
+        # Join content lines with double newlines for paragraph spacing
+        return "\n\n".join(self.content_lines)
+
+    @content.setter
+    def content(self, value: str):
+        self.content_lines = [value] if value else []
+
+    def _finish_content(self) -> List[Tuple[str, object]]:
+        if not self._in_content:
+            return []
+        self._in_content = False
+        return [("content", self.content)]
+
+    def _process_line(self, line: str) -> List[Tuple[str, object]]:
+        line = line.strip()
+        prefix = line[:_LABEL_PREFIX_LEN].upper()
+        for label, field in _LABELS:
+            if prefix.startswith(label):
+                events = self._finish_content()
+                value = line[len(label):].strip()
+                if field == "title":
+                    self.title = value
+                    events.append(("title", self.title))
+                elif field == "content":
+                    self._in_content = True
+                    if value:
+                        self.content_lines.append(value)
+                elif field == "hashtags":
+                    self.hashtags = _clean_hashtags(value)
+                    events.append(("hashtags", self.hashtags))
+                else:
+                    self.call_to_action = value
+                    events.append(("call_to_action", self.call_to_action))
+                return events
+        if self._in_content and line:
+            # Accumulate content lines until the next section marker
+            self.content_lines.append(line)
+        return []
+
+
+def _clean_hashtags(tags) -> List[str]:
+    # Clean and split hashtags (remove # if present)
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    return [str(t).strip().replace("#", "") for t in tags if str(t).strip()]
+
+
+class StructuredPostParser:
+    """Parser for structured output mode, where the model returns the post fields as JSON.
+
+    feed() takes the partial field dicts produced while the JSON is streamed (or the
+    complete dict once) and returns the sections completed so far, with the same events
+    and attributes as StreamingPostParser. A field is complete once the model has moved
+    on to the next key; the last one is completed by close().
+    """
+
+    def __init__(self):
+        self._fields: Dict[str, object] = {}
+        self._emitted = set()
+        self.title = ""
+        self.content = ""
+        self.hashtags: List[str] = []
+        self.call_to_action = ""
+
+    @classmethod
+    def parse(cls, data: Dict[str, object]) -> "StructuredPostParser":
+        """Parses a complete field dict and returns the finished parser."""
+        parser = cls()
+        parser.feed(data)
+        parser.close()
+        return parser
+
+    def feed(self, partial: Dict[str, object]) -> List[Tuple[str, object]]:
+        self._fields = dict(partial)
+        return self._emit(list(self._fields)[:-1])
+
+    def close(self) -> List[Tuple[str, object]]:
+        return self._emit(list(self._fields))
+
+    def _emit(self, keys: List[str]) -> List[Tuple[str, object]]:
+        events = []
+        for _, field in _LABELS:
+            if field not in keys or field in self._emitted:
+                continue
+            value = self._fields[field]
+            if field == "hashtags":
+                value = _clean_hashtags(value or [])
+            else:
+                value = str(value or "").strip()
+            setattr(self, field, value)
+            self._emitted.add(field)
+            events.append((field, value))
+        return events
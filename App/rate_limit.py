@@ -0,0 +1,80 @@
+"""
+Client-side rate limiting for the model provider.
+
+Paces calls against the provider's requests-per-minute (RPM) and tokens-per-minute (TPM)
+budgets with two token buckets, so bursts are smoothed locally instead of being answered
+with provider 429s and retried.
+"""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Bucket refilled continuously at per_minute / 60 units per second.
+
+    The capacity (largest burst) is burst_seconds worth of refill. A single request larger
+    than the capacity is allowed once the bucket is full, leaving it negative.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount can be taken (0 if it can be taken now)."""
+        self._refill()
+        needed = min(amount, self.capacity) - self.tokens
+        return max(0.0, needed / self.rate)
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount
+
+    def give_back(self, amount: float) -> None:
+        """Returns (or, if negative, charges) the difference between an estimate and actual use."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class ProviderRateLimiter:
+    """Paces LLM calls to stay within RPM and TPM budgets (0 disables a budget).
+
+    acquire() reserves one request and an estimated token count, waiting in FIFO order
+    until both buckets allow it. Once the call has finished, record_usage() corrects the
+    token bucket with the usage actually reported by the provider.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, burst_seconds: float = 10):
+        self.requests = TokenBucket(requests_per_minute, burst_seconds) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute, burst_seconds) if tokens_per_minute > 0 else None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        # Holding the lock while sleeping keeps waiters in arrival order
+        async with self._lock:
+            while True:
+                wait = 0.0
+                if self.requests is not None:
+                    wait = max(wait, self.requests.wait_time(1))
+                if self.tokens is not None:
+                    wait = max(wait, self.tokens.wait_time(estimated_tokens))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(estimated_tokens)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        if self.tokens is not None and actual_tokens:
+            self.tokens.give_back(estimated_tokens - actual_tokens)
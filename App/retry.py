@@ -0,0 +1,108 @@
+"""
+Retry and hedging policies for upstream LLM calls.
+
+RetryPolicy retries transient failures (timeouts, connection errors, 429 and 5xx) with
+full-jitter exponential backoff. HedgePolicy tracks recent time-to-first-token and tells
+the agent when a call is slow enough (above the configured percentile) to start a second,
+hedged call and keep whichever finishes first.
+"""
+
+import asyncio
+import math
+import random
+from collections import deque
+from typing import Optional
+
+import httpx
+
+from .admission import OverloadedError
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True for failures worth retrying: timeouts, connection errors, 429 and 5xx responses."""
+    if isinstance(exc, OverloadedError):
+        # Rejected by our own admission control; retrying would only add load
+        return False
+    if isinstance(exc, (asyncio.TimeoutError, httpx.TimeoutException, httpx.TransportError)):
+        return True
+    status_code = getattr(exc, "status_code", None)
+    if status_code is not None:
+        return status_code == 429 or status_code >= 500
+    # openai.APIConnectionError / APITimeoutError carry no status code; matched by name so
+    # the openai SDK does not have to be imported here
+    return type(exc).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def _retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Retry-After sent by the provider with a 429/503, if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Full-jitter exponential backoff: delay is uniform in [0, min(max_delay, base_delay * 2**attempt)].
+
+    With a budget, no retry is started unless it could take a full attempt_timeout and still
+    end within budget seconds of the first attempt, so a request is never still retrying
+    after the reverse proxy in front of the API has given up on it.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 2,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        budget: Optional[float] = None,
+        attempt_timeout: float = 0.0,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.attempt_timeout = attempt_timeout
+
+    def next_delay(self, attempt: int, exc: BaseException, elapsed: float = 0.0) -> Optional[float]:
+        """Seconds to wait before retry number attempt + 1, or None if the call must not be retried.
+
+        elapsed is the time spent since the first attempt started.
+        """
+        if attempt >= self.max_retries or not is_retryable(exc):
+            return None
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = _retry_after_seconds(exc)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        if self.budget is not None and elapsed + delay + self.attempt_timeout > self.budget:
+            return None
+        return delay
+
+
+class HedgePolicy:
+    """Derives the hedging delay from a rolling window of time-to-first-token samples.
+
+    No hedge is sent until min_samples calls have been observed; after that a second call
+    is started when the first has produced no token within the given percentile of recent
+    first-token latencies (never less than min_delay seconds).
+    """
+
+    def __init__(self, percentile: float = 95, window: int = 200, min_samples: int = 20, min_delay: float = 0.5):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._samples: deque = deque(maxlen=window)
+
+    def record_first_token(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def threshold(self) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, math.ceil(self.percentile / 100 * len(ordered)) - 1)
+        return max(self.min_delay, ordered[index])
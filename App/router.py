@@ -0,0 +1,125 @@
+"""
+Latency-aware routing across several OpenAI-compatible model backends.
+
+Each generation goes to the available backend with the lowest expected wait, scored as
+EWMA latency x (in-flight calls + 1). Backends that keep failing are taken out of
+rotation by a per-backend circuit breaker until a probe call succeeds again. With a
+single backend there is nothing to fail over to, so its breaker is not used; the
+agent's own circuit breaker (CIRCUIT_*) judges the upstream per generation instead.
+"""
+
+import json
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from .admission import OverloadedError
+from .circuit_breaker import CircuitBreaker
+from .retry import is_retryable
+
+
+class BackendUnavailableError(OverloadedError):
+    """Raised when every backend's circuit is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("All model backends are unavailable, please retry later", 503, max(1, math.ceil(retry_after)))
+
+
+class Backend:
+    """One model endpoint with its live latency/load statistics."""
+
+    def __init__(self, base_url: str, api_key: str, model_name: str, breaker: CircuitBreaker):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.model_name = model_name
+        self.breaker = breaker
+        self.ewma_latency: Optional[float] = None
+        self.in_flight = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.model_name}@{self.base_url}"
+
+    def score(self, default_latency: float) -> tuple:
+        """Expected wait (lower is better); ties, e.g. before any measurement, go to the least loaded."""
+        latency = self.ewma_latency if self.ewma_latency is not None else default_latency
+        return latency * (self.in_flight + 1), self.in_flight
+
+
+class BackendRouter:
+    def __init__(self, backends: List[Backend], ewma_alpha: float = 0.3):
+        if not backends:
+            raise ValueError("❌ At least one model backend must be configured")
+        self.backends = backends
+        self.ewma_alpha = ewma_alpha
+        # Per-backend breakers count every attempt, retries included; only worth it for failover
+        self.use_breakers = len(backends) > 1
+
+    def choose(self) -> Backend:
+        """Picks the available backend with the lowest score and claims it."""
+        if not self.use_breakers:
+            return self.backends[0]
+        # Unmeasured backends are assumed to be as fast as the average measured one
+        measured = [b.ewma_latency for b in self.backends if b.ewma_latency is not None]
+        default_latency = sum(measured) / len(measured) if measured else 0.0
+        candidates = [b for b in self.backends if b.breaker.available()]
+        for backend in sorted(candidates, key=lambda b: b.score(default_latency)):
+            if backend.breaker.allow_request():
+                return backend
+        raise BackendUnavailableError(min(b.breaker.retry_after() for b in self.backends))
+
+    @asynccontextmanager
+    async def route(self):
+        """Chooses a backend for one call and records its latency and outcome."""
+        backend = self.choose()
+        backend.in_flight += 1
+        started = time.monotonic()
+        try:
+            yield backend
+        except Exception as e:
+            # Only upstream trouble counts against the backend, not e.g. a bad request
+            if self.use_breakers:
+                if is_retryable(e):
+                    backend.breaker.record_failure()
+                else:
+                    backend.breaker.release()
+            raise
+        except BaseException:
+            # Cancelled (e.g. a hedged call that lost the race): no verdict on the backend
+            if self.use_breakers:
+                backend.breaker.release()
+            raise
+        else:
+            elapsed = time.monotonic() - started
+            if backend.ewma_latency is None:
+                backend.ewma_latency = elapsed
+            else:
+                backend.ewma_latency = self.ewma_alpha * elapsed + (1 - self.ewma_alpha) * backend.ewma_latency
+            if self.use_breakers:
+                backend.breaker.record_success()
+        finally:
+            backend.in_flight -= 1
+
+
+def parse_backends(
+    raw: str,
+    default_base_url: str,
+    default_api_key: str,
+    default_model_name: str,
+    failure_threshold: int,
+    reset_timeout: float,
+) -> List[Backend]:
+    """Builds the backend list from LLM_BACKENDS, a JSON list of objects with base_url,
+    api_key and model_name keys (missing keys use the BASE_URL/API_KEY/MODEL_NAME defaults).
+    An empty value means a single backend from the defaults."""
+    entries = json.loads(raw) if raw.strip() else [{}]
+    return [
+        Backend(
+            base_url=entry.get("base_url", default_base_url),
+            api_key=entry.get("api_key", default_api_key),
+            model_name=entry.get("model_name", default_model_name),
+            breaker=CircuitBreaker(failure_threshold, reset_timeout),
+        )
+        for entry in entries
+    ]
@@ -0,0 +1,110 @@
+"""
+Production launcher for the LinkedIn Post Generator API.
+
+Runs App.main:app under several uvicorn worker processes so JSON serialization, output
+parsing and pydantic validation can use every core. uvloop and httptools are used when
+installed (pip install "uvicorn[standard]").
+
+Usage (from the project root):
+    python -m App.serve
+
+Each worker is a separate process, so the in-memory response cache and the in-flight
+request coalescing are per worker; use CACHE_BACKEND=sqlite to share cached posts.
+Admission control (MAX_IN_FLIGHT_LLM_CALLS, MAX_QUEUED_LLM_CALLS) is per worker too,
+while RATE_LIMIT_RPM/RATE_LIMIT_TPM are split evenly between the workers.
+"""
+
+import glob
+import os
+import importlib.util
+import tempfile
+import uvicorn
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+# Default worker count: admission limits, job workers and the memory cache are all per
+# worker, so more workers multiply the concurrency reaching the model provider
+MAX_DEFAULT_WORKERS = 4
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, honouring the CPU set and a cgroup CPU quota (docker --cpus).
+
+    os.cpu_count() reports the host's cores, even inside a container limited to fewer.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS / Windows
+        cpus = os.cpu_count() or 1
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+    except (OSError, ValueError):
+        try:
+            # cgroup v1: quota is -1 when unlimited
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = f.read().strip()
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = f.read().strip()
+        except OSError:
+            return cpus
+    if quota not in ("max", "-1") and int(period) > 0:
+        cpus = min(cpus, max(1, int(quota) // int(period)))
+    return cpus
+
+
+# WEB_CONCURRENCY is the conventional worker-count variable; by default one worker per
+# available CPU, at most MAX_DEFAULT_WORKERS
+WORKERS = int(os.getenv("WEB_CONCURRENCY", str(min(available_cpus(), MAX_DEFAULT_WORKERS))))
+# Workers inherit the environment; App.main divides the provider rate limits by this count
+os.environ["WEB_CONCURRENCY"] = str(WORKERS)
+# Size of the listen queue for connections waiting to be accepted
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+# Seconds to keep idle client connections (e.g. from nginx) open between requests
+SERVER_KEEPALIVE_TIMEOUT = int(os.getenv("SERVER_KEEPALIVE_TIMEOUT", "75"))
+# Seconds in-flight requests get to finish on shutdown before workers are killed
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def prepare_metrics_dir() -> None:
+    """Sets up PROMETHEUS_MULTIPROC_DIR so /metrics aggregates every worker, not just the one scraped.
+
+    The directory must start empty: samples left by a previous run would be added to this one's.
+    """
+    if WORKERS > 1 and not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prometheus_")
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        os.makedirs(path, exist_ok=True)
+        for stale in glob.glob(os.path.join(path, "*.db")):
+            os.remove(stale)
+
+
+def main():
+    prepare_metrics_dir()
+    uvicorn.run(
+        "App.main:app",
+        host=HOST,
+        port=PORT,
+        workers=WORKERS,
+        loop="uvloop" if _installed("uvloop") else "asyncio",
+        http="httptools" if _installed("httptools") else "h11",
+        backlog=SERVER_BACKLOG,
+        timeout_keep_alive=SERVER_KEEPALIVE_TIMEOUT,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT,
+        # The access log is a per-request print in every worker; nginx already logs requests
+        access_log=False,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+OpenTelemetry tracing for the LinkedIn Post Generator API.
+
+Incoming requests continue the trace from the W3C traceparent header (forwarded by
+nginx), and every runnable of the LCEL post chain (RunnableAssign, PromptTemplate,
+ChatOpenAI, StrOutputParser) becomes a child span; model spans carry the model name
+and token counts.
+
+Uses the optional opentelemetry-sdk package (pip install opentelemetry-sdk). Spans are
+exported to the console or appended as JSON lines to a file, selected by TRACING_EXPORTER.
+"""
+
+from typing import Dict, Optional
+
+from langchain.callbacks.base import BaseCallbackHandler
+
+from .usage import extract_usage
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import trace
+    from opentelemetry.propagate import extract
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+except ImportError:  # opentelemetry-sdk is optional
+    trace = None
+
+SERVICE_NAME = "linkedin-post-generator"
+
+_tracer = None
+
+
+def setup_tracing(exporter: str, file_path: str = "traces.jsonl") -> bool:
+    """Configures the tracer for TRACING_EXPORTER ("console", "file" or "none").
+
+    Returns True if tracing is active.
+    """
+    global _tracer
+    exporter = exporter.lower()
+    if exporter == "none":
+        return False
+    if trace is None:
+        print("⚠️ TRACING_EXPORTER is set but opentelemetry-sdk is not installed; tracing disabled")
+        return False
+
+    if exporter == "console":
+        span_exporter = ConsoleSpanExporter()
+    elif exporter == "file":
+        span_exporter = ConsoleSpanExporter(
+            out=open(file_path, "a", encoding="utf-8"),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    else:
+        raise ValueError(f"❌ Unknown TRACING_EXPORTER '{exporter}' (expected console, file or none)")
+
+    provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    _tracer = provider.get_tracer(__name__)
+    return True
+
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+def start_request_span(method: str, path: str, headers):
+    """Starts the server span of an incoming request, continuing the caller's trace if any."""
+    return _tracer.start_as_current_span(
+        f"{method} {path}",
+        context=extract(headers),
+        kind=trace.SpanKind.SERVER,
+        attributes={"http.method": method, "http.route": path},
+    )
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Turns the LangChain callbacks of one chain run into nested OpenTelemetry spans.
+
+    Spans are parented by LangChain run ids rather than the ambient context, so the tree
+    stays correct when runnables execute in other tasks; the root span is parented to the
+    context current when the handler is created (normally the request span).
+    """
+
+    # Run in the caller's task instead of a thread pool; span bookkeeping is cheap
+    run_inline = True
+
+    def __init__(self):
+        self._parent_context = otel_context.get_current()
+        self._spans: Dict[object, object] = {}
+        self._streaming_runs = set()
+
+    def _start(self, name: str, run_id, parent_run_id, attributes: Optional[dict] = None):
+        parent = self._spans.get(parent_run_id)
+        context = trace.set_span_in_context(parent) if parent is not None else self._parent_context
+        self._spans[run_id] = _tracer.start_span(name, context=context, attributes=attributes or {})
+
+    def _end(self, run_id, error: Optional[BaseException] = None):
+        self._streaming_runs.discard(run_id)
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(trace.Status(trace.StatusCode.ERROR, str(error)))
+        span.end()
+
+    @staticmethod
+    def _name(serialized, kwargs, default: str) -> str:
+        return kwargs.get("name") or (serialized or {}).get("name") or default
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        self._start(self._name(serialized, kwargs, "chain"), run_id, parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        invocation_params = kwargs.get("invocation_params") or {}
+        model_name = invocation_params.get("model") or invocation_params.get("model_name") \
+            or (metadata or {}).get("ls_model_name", "")
+        self._start(
+            self._name(serialized, kwargs, "chat_model"),
+            run_id,
+            parent_run_id,
+            {"gen_ai.request.model": model_name},
+        )
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        span = self._spans.get(run_id)
+        if span is not None and run_id not in self._streaming_runs:
+            self._streaming_runs.add(run_id)
+            span.add_event("first_token")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        span = self._spans.get(run_id)
+        if span is not None:
+            prompt_tokens, completion_tokens = extract_usage(response)
+            span.set_attribute("gen_ai.usage.input_tokens", prompt_tokens)
+            span.set_attribute("gen_ai.usage.output_tokens", completion_tokens)
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
@@ -0,0 +1,107 @@
+"""
+Token usage capture for LLM calls.
+
+The generation chain ends in StrOutputParser, so the usage metadata returned by
+ChatOpenAI is not part of the chain output. UsageCallbackHandler is passed in the
+chain's run config and records it from the chat model's result instead.
+"""
+
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from langchain.callbacks.base import AsyncCallbackHandler
+
+
+def extract_usage(response) -> Tuple[int, int]:
+    """Returns (prompt tokens, completion tokens) reported in an LLMResult."""
+    # Chat models attach usage_metadata to the generated message (also when streaming
+    # with stream_usage=True); older providers only report it in llm_output.
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+    token_usage = (response.llm_output or {}).get("token_usage") or {}
+    return token_usage.get("prompt_tokens", 0), token_usage.get("completion_tokens", 0)
+
+
+def extract_model_name(response) -> Optional[str]:
+    """Returns the model name the provider reports having used, if any."""
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "response_metadata", None) or {}
+            if metadata.get("model_name"):
+                return metadata["model_name"]
+    return (response.llm_output or {}).get("model_name")
+
+
+class UsageCallbackHandler(AsyncCallbackHandler):
+    """Collects prompt/completion token counts reported by the model for one chain run."""
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.model_name: Optional[str] = None
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    async def on_llm_end(self, response, **kwargs) -> None:
+        prompt_tokens, completion_tokens = extract_usage(response)
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.model_name = extract_model_name(response) or self.model_name
+
+
+class RequestUsage:
+    """Tokens spent on behalf of one API request, summed over all its upstream calls
+    (retries and hedges included). Cache hits and coalesced duplicates cost nothing."""
+
+    def __init__(self, parent: Optional["RequestUsage"] = None):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.model_name: Optional[str] = None
+        # Share of each language in a request fanned out to several languages
+        self.by_language: Dict[str, "RequestUsage"] = {}
+        self._parent = parent
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, handler: UsageCallbackHandler) -> None:
+        self.prompt_tokens += handler.prompt_tokens
+        self.completion_tokens += handler.completion_tokens
+        self.model_name = handler.model_name or self.model_name
+        if self._parent is not None:
+            self._parent.add(handler)
+
+
+# Usage accumulator of the request being handled; tasks started for the request (such as
+# a single-flight generation) inherit it, so their upstream calls are billed to it
+_request_usage: ContextVar[Optional[RequestUsage]] = ContextVar("request_usage", default=None)
+
+
+def track_request_usage() -> RequestUsage:
+    """Starts accounting token usage for the current request (or batch item)."""
+    usage = RequestUsage()
+    _request_usage.set(usage)
+    return usage
+
+
+def track_language_usage(language: str) -> None:
+    """Accounts the current task's upstream calls to one language of the request, as well as to the request."""
+    request = _request_usage.get()
+    if request is not None:
+        if language not in request.by_language:
+            request.by_language[language] = RequestUsage(parent=request)
+        _request_usage.set(request.by_language[language])
+
+
+def add_request_usage(handler: UsageCallbackHandler) -> None:
+    usage = _request_usage.get()
+    if usage is not None:
+        usage.add(handler)
@@ -0,0 +1,97 @@
+"""
+Per-client, per-day token usage store.
+
+Keeps one aggregated row per (day, client, language, model) in SQLite, counting the
+requests that reached the model and their tokens, so usage can be
+queried cheaply (GET /usage) to see which callers and languages are expensive.
+Calls block on SQLite, so async callers run them in a thread.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from .usage import RequestUsage
+
+
+class UsageStore:
+    def __init__(self, path: str, prompt_cost_per_1k: float = 0.0, completion_cost_per_1k: float = 0.0):
+        self.prompt_cost_per_1k = prompt_cost_per_1k
+        self.completion_cost_per_1k = completion_cost_per_1k
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # Every worker process writes here; WAL keeps GET /usage reads from waiting on them
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS token_usage ("
+            " day TEXT NOT NULL,"
+            " client_id TEXT NOT NULL,"
+            " language TEXT NOT NULL,"
+            " model TEXT NOT NULL,"
+            " requests INTEGER NOT NULL,"
+            " prompt_tokens INTEGER NOT NULL,"
+            " completion_tokens INTEGER NOT NULL,"
+            " PRIMARY KEY (day, client_id, language, model))"
+        )
+        self._conn.commit()
+
+    def record(self, client_id: str, language: str, default_model: str, usage: RequestUsage) -> None:
+        day = datetime.now(timezone.utc).date().isoformat()
+        model = usage.model_name or default_model
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO token_usage VALUES (?, ?, ?, ?, 1, ?, ?)"
+                " ON CONFLICT (day, client_id, language, model) DO UPDATE SET"
+                " requests = requests + 1,"
+                " prompt_tokens = prompt_tokens + excluded.prompt_tokens,"
+                " completion_tokens = completion_tokens + excluded.completion_tokens",
+                (day, client_id, language.strip().lower(), model, usage.prompt_tokens, usage.completion_tokens),
+            )
+            self._conn.commit()
+
+    def query(
+        self,
+        client_id: Optional[str] = None,
+        start_day: Optional[str] = None,
+        end_day: Optional[str] = None,
+    ) -> List[dict]:
+        """Aggregated rows, optionally filtered by client and an inclusive YYYY-MM-DD day range."""
+        conditions, params = [], []
+        if client_id:
+            conditions.append("client_id = ?")
+            params.append(client_id)
+        if start_day:
+            conditions.append("day >= ?")
+            params.append(start_day)
+        if end_day:
+            conditions.append("day <= ?")
+            params.append(end_day)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT day, client_id, language, model, requests, prompt_tokens, completion_tokens"
+                f" FROM token_usage{where} ORDER BY day, client_id, language, model",
+                params,
+            ).fetchall()
+        return [
+            {
+                "day": day,
+                "client_id": client,
+                "language": language,
+                "model": model,
+                "requests": requests,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "estimated_cost": round(
+                    prompt_tokens / 1000 * self.prompt_cost_per_1k
+                    + completion_tokens / 1000 * self.completion_cost_per_1k,
+                    6,
+                ),
+            }
+            for day, client, language, model, requests, prompt_tokens, completion_tokens in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,126 @@
+"""Bulk mode of the CLI agent (generate_bulk) with a stub agent instead of the model."""
+
+import asyncio
+import json
+import os
+import sys
+
+# The CLI module reads its settings and imports its sibling modules at import time
+os.environ.setdefault("BASE_URL", "http://127.0.0.1:9/v1")
+os.environ.setdefault("MODEL_NAME", "test-model")
+os.environ.setdefault("API_KEY", "test")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "App"))
+
+import Lnkedin_post_agent as cli  # noqa: E402
+
+
+class StubAgent:
+    """Answers generate_post like the real agent, failing for the topics in fail_topics."""
+
+    def __init__(self, fail_topics=()):
+        self.calls = []
+        self.fail_topics = set(fail_topics)
+
+    async def generate_post(self, topic, language="English", fallback=True):
+        self.calls.append((topic, language))
+        await asyncio.sleep(0.01)
+        if topic in self.fail_topics:
+            raise RuntimeError(f"upstream failed for {topic}")
+        return cli.LinkedInPost(title=f"{topic} ({language})", content="Body", hashtags=["tag"], call_to_action="CTA")
+
+
+def write_csv(path, rows):
+    path.write_text("id,topic,language\n" + "".join(f"{i},{t},{lang}\n" for i, t, lang in rows), encoding="utf-8")
+
+
+def read_journal(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def run_bulk(agent, input_path, output_path, concurrency=4):
+    return asyncio.run(cli.generate_bulk(agent, str(input_path), str(output_path), concurrency))
+
+
+def test_duplicate_rows_share_one_generation(tmp_path):
+    input_path, output_path = tmp_path / "calendar.csv", tmp_path / "posts.jsonl"
+    write_csv(input_path, [
+        (1, "AI", "English"), (2, "AI", "English"), (3, "Cloud", "English"), (4, "AI", "English"), (5, "Cloud", "Spanish"),
+    ])
+    agent = StubAgent()
+
+    counts = run_bulk(agent, input_path, output_path)
+
+    assert sorted(agent.calls) == [("AI", "English"), ("Cloud", "English"), ("Cloud", "Spanish")]
+    assert counts["generated"] == 3 and counts["reused"] == 2 and counts["failed"] == 0
+    records = {record["id"]: record for record in read_journal(output_path)}
+    assert set(records) == {"1", "2", "3", "4", "5"}
+    assert records["2"]["post"] == records["1"]["post"] == records["4"]["post"]
+    assert records["2"]["post"]["title"] == "AI (English)"
+
+
+def test_rerun_resumes_and_retries_failed_rows(tmp_path):
+    input_path, output_path = tmp_path / "calendar.csv", tmp_path / "posts.jsonl"
+    write_csv(input_path, [(1, "AI", "English"), (2, "Cloud", "English"), (3, "Data", "English")])
+
+    counts = run_bulk(StubAgent(fail_topics={"Cloud"}), input_path, output_path)
+    assert counts["generated"] == 2 and counts["failed"] == 1
+
+    agent = StubAgent()
+    counts = run_bulk(agent, input_path, output_path)
+
+    # Only the failed row is generated again; the newest line for it holds the post
+    assert agent.calls == [("Cloud", "English")]
+    assert counts["skipped"] == 2 and counts["generated"] == 1
+    latest = {record["id"]: record for record in read_journal(output_path)}
+    assert all(record.get("post") for record in latest.values())
+
+
+def test_changed_row_is_generated_again(tmp_path):
+    input_path, output_path = tmp_path / "calendar.csv", tmp_path / "posts.jsonl"
+    write_csv(input_path, [(1, "AI", "English")])
+    run_bulk(StubAgent(), input_path, output_path)
+
+    write_csv(input_path, [(1, "AI", "Spanish")])
+    agent = StubAgent()
+    run_bulk(agent, input_path, output_path)
+
+    assert agent.calls == [("AI", "Spanish")]
+
+
+def test_journal_errors_do_not_stop_the_run(tmp_path, monkeypatch):
+    input_path, output_path = tmp_path / "calendar.csv", tmp_path / "posts.jsonl"
+    # More rows than the queue holds, so a dead worker pool would leave the producer blocked
+    write_csv(input_path, [(i, f"Topic {i}", "English") for i in range(1, 31)])
+
+    def failing_append(self, record):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(cli.BatchJournal, "append", failing_append)
+    counts = asyncio.run(asyncio.wait_for(
+        cli.generate_bulk(StubAgent(), str(input_path), str(output_path), 2), timeout=10
+    ))
+
+    assert counts["generated"] == 30 and counts["unrecorded"] == 30
+
+
+
+def test_open_circuit_pauses_the_run_instead_of_failing_rows(tmp_path):
+    input_path, output_path = tmp_path / "calendar.csv", tmp_path / "posts.jsonl"
+    write_csv(input_path, [(i, f"Topic {i}", "English") for i in range(1, 11)])
+
+    class OutageAgent(StubAgent):
+        """Refuses the first calls as if the circuit had opened during a short outage."""
+
+        refusals = 6
+
+        async def generate_post(self, topic, language="English", fallback=True):
+            if self.refusals:
+                self.refusals -= 1
+                raise cli.CircuitOpenError(retry_after=0.01)
+            return await super().generate_post(topic, language, fallback)
+
+    counts = run_bulk(OutageAgent(), input_path, output_path)
+
+    assert counts["generated"] == 10 and counts["failed"] == 0
+    assert all(record.get("post") for record in read_journal(output_path))